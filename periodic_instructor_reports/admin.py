@@ -2,11 +2,19 @@
 Django admin integration for periodic instructor reports.
 """
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from django_celery_beat.models import PeriodicTask, PeriodicTasks
 from periodic_instructor_reports.models import (
+    CourseReportDuration,
     PeriodicReportTask,
     PeriodicReportSchedule,
+    ReportArtifact,
+    ReportTimeout,
 )
+from periodic_instructor_reports.tasks import run_schedules_now
 
 
 @admin.register(PeriodicReportTask)
@@ -15,24 +23,183 @@ class PeriodicReportTaskAdmin(admin.ModelAdmin):
     Django admin widget for `PeriodicReportTask`s.
     """
 
-    list_display = ["name", "path", "requires_request"]
+    list_display = ["name", "path", "requires_request", "cache_artifacts"]
     list_filter = ["name", "path", "requires_request"]
     search_fields = ["name", "path"]
 
 
+class BoundedCountPaginator(Paginator):
+    """
+    Paginator counting at most `max_count` objects.
+
+    Counting every row of a large table is slow, so the changelist stops counting
+    after `max_count` rows. The objects beyond that are reachable by filtering.
+    """
+
+    max_count = 10000
+
+    @cached_property
+    def count(self) -> int:
+        return self.object_list[:self.max_count].count()
+
+
 @admin.register(PeriodicReportSchedule)
 class PeriodicReportScheduleAdmin(admin.ModelAdmin):
     """
     Django admin widget for `PeriodicReportSchedule`s.
     """
 
-    list_display = ["task", "interval", "courses", "arguments", "keyword_arguments"]
-    list_filter = ["task__name", "course_ids"]
+    list_display = ["task", "interval", "owner", "courses", "enabled", "arguments", "keyword_arguments"]
+    list_filter = ["task__name", "celery_task__enabled"]
     search_fields = ["task__name", "task__path", "course_ids"]
+    list_select_related = ["task", "interval", "owner", "celery_task"]
+    actions = ["run_now", "enable", "disable"]
+    paginator = BoundedCountPaginator
+    show_full_result_count = False
+
+    # Number of courses listed on the changelist before the rest is summarized
+    max_listed_courses = 3
 
     def courses(self, obj: PeriodicReportSchedule) -> str:
         """
-        Return the formatted list of courses.
+        Return the formatted, truncated list of courses and course selectors.
+        """
+
+        course_ids = [*obj.course_ids, *obj.course_selectors]
+        listed_course_ids = ", ".join(course_ids[:self.max_listed_courses])
+
+        if len(course_ids) > self.max_listed_courses:
+            return f"{listed_course_ids} and {len(course_ids) - self.max_listed_courses} more"
+
+        return listed_course_ids
+
+    def enabled(self, obj: PeriodicReportSchedule) -> bool:
+        """
+        Return whether the schedule's periodic task is enabled.
+        """
+
+        return bool(obj.celery_task and obj.celery_task.enabled)
+
+    enabled.boolean = True
+    enabled.admin_order_field = "celery_task__enabled"
+
+    def set_enabled(self, queryset: QuerySet, enabled: bool) -> int:
+        """
+        Enable or disable the periodic tasks of the schedules using a single query.
+        """
+
+        updated = PeriodicTask.objects.filter(
+            id__in=queryset.values("celery_task_id"),
+        ).update(enabled=enabled)
+
+        # Bulk updates do not send signals, so Celery beat has to be notified explicitly
+        PeriodicTasks.update_changed()
+
+        return updated
+
+    def run_now(self, request, queryset: QuerySet) -> None:
+        """
+        Dispatch a run of the selected schedules.
+
+        The runs are dispatched by a single task, so the request does not publish a message per schedule.
+        """
+
+        schedule_ids = list(queryset.values_list("id", flat=True))
+        run_schedules_now.delay(schedule_ids)
+
+        self.message_user(request, f"Dispatched {len(schedule_ids)} schedule(s).", messages.SUCCESS)
+
+    run_now.short_description = "Run selected schedules now"
+
+    def enable(self, request, queryset: QuerySet) -> None:
+        """
+        Enable the periodic tasks of the selected schedules.
         """
 
-        return ", ".join(list(obj.course_ids))
+        updated = self.set_enabled(queryset, True)
+        self.message_user(request, f"Enabled {updated} schedule(s).", messages.SUCCESS)
+
+    enable.short_description = "Enable selected schedules"
+
+    def disable(self, request, queryset: QuerySet) -> None:
+        """
+        Disable the periodic tasks of the selected schedules.
+        """
+
+        updated = self.set_enabled(queryset, False)
+        self.message_user(request, f"Disabled {updated} schedule(s).", messages.SUCCESS)
+
+    disable.short_description = "Disable selected schedules"
+
+
+@admin.register(CourseReportDuration)
+class CourseReportDurationAdmin(admin.ModelAdmin):
+    """
+    Django admin widget for `CourseReportDuration`s.
+
+    The estimates are maintained by the periodic task wrapper, hence they are read-only.
+    """
+
+    list_display = ["course_id", "task_path", "estimate", "samples", "updated_at"]
+    list_filter = ["task_path"]
+    search_fields = ["course_id", "task_path"]
+    ordering = ["-estimate"]
+    readonly_fields = ["course_id", "task_path", "estimate", "samples", "updated_at"]
+
+    def has_add_permission(self, request) -> bool:
+        return False
+
+
+@admin.register(ReportArtifact)
+class ReportArtifactAdmin(admin.ModelAdmin):
+    """
+    Django admin widget for `ReportArtifact`s.
+
+    The artifacts are maintained by the periodic task wrapper, hence they are read-only.
+    """
+
+    list_display = ["course_id", "task_path", "version", "hits", "misses", "hit_rate", "last_used_at"]
+    list_filter = ["task_path"]
+    search_fields = ["course_id", "task_path"]
+    ordering = ["-last_used_at"]
+    readonly_fields = [
+        "course_id",
+        "task_path",
+        "arguments_hash",
+        "version",
+        "upload_parent_dir",
+        "generated_at",
+        "last_used_at",
+        "hits",
+        "misses",
+    ]
+
+    def hit_rate(self, obj: ReportArtifact) -> str:
+        """
+        Return the share of the runs which reused the report.
+        """
+
+        runs = obj.hits + obj.misses
+        return f"{obj.hits / runs:.0%}" if runs else "-"
+
+    def has_add_permission(self, request) -> bool:
+        return False
+
+
+@admin.register(ReportTimeout)
+class ReportTimeoutAdmin(admin.ModelAdmin):
+    """
+    Django admin widget for `ReportTimeout`s.
+
+    The timeouts are recorded by the periodic task wrapper, hence they are read-only.
+    """
+
+    list_display = ["created_at", "course_id", "schedule", "kind", "elapsed"]
+    list_filter = ["kind"]
+    list_select_related = ["schedule__task", "schedule__interval"]
+    search_fields = ["course_id"]
+    ordering = ["-created_at"]
+    readonly_fields = ["created_at", "course_id", "schedule", "kind", "elapsed"]
+
+    def has_add_permission(self, request) -> bool:
+        return False
@@ -33,6 +33,7 @@ class PeriodicInstructorReportsConfig(AppConfig):
         """
 
         # pylint: disable=import-outside-toplevel
-        from periodic_instructor_reports import signals
+        from periodic_instructor_reports import signals, tracing
 
         assert signals
+        assert tracing
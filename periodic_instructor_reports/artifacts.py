@@ -0,0 +1,363 @@
+"""
+Content-version cache of the generated report artifacts.
+
+Many courses' grades, enrollments and content do not change between two runs of
+a schedule, yet every run would generate their reports again. For report tasks
+with `cache_artifacts` enabled, the periodic task wrapper records the version of
+the course's data every report was generated at. While the version is unchanged,
+the report files of the previous call are copied to the new upload folder, or
+left in place if the folder is the same, instead of calling the report task.
+
+A course's reports of different tasks can be uploaded to the same folder, so the
+report files are told apart by the task's `artifact_name` (like `grade_report`),
+which follows the course in the file names. The edX platform's report functions
+only submit an instructor task, which writes the report files after the call
+returned, so the call records only the version and the time it was made. The
+next run looks up the files written since then, records their names, and reuses
+only those files afterwards.
+
+The version of the course's data is returned by a pluggable provider, configured
+by the `PERIODIC_INSTRUCTOR_REPORTS_COURSE_VERSION_PROVIDER` setting, and the
+report files are looked up and copied by a pluggable artifact store, configured
+by the `PERIODIC_INSTRUCTOR_REPORTS_REPORT_ARTIFACT_STORE` setting. By default,
+the edX platform's course data and instructor report store are used.
+
+The cached artifacts not used for `PERIODIC_INSTRUCTOR_REPORTS_ARTIFACT_CACHE_MAX_AGE`
+seconds are evicted, as well as the least recently used ones exceeding
+`PERIODIC_INSTRUCTOR_REPORTS_ARTIFACT_CACHE_MAX_ENTRIES`. Evicting an artifact
+does not delete the report files.
+"""
+
+import hashlib
+import json
+import posixpath
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.db.models import Count, F, Max
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from opaque_keys.edx.keys import CourseKey
+
+from periodic_instructor_reports import metrics
+from periodic_instructor_reports.compat import (
+    get_course_enrollment_model,
+    get_course_filename_prefix,
+    get_course_overview_model,
+    get_persistent_course_grade_model,
+    get_report_store,
+)
+from periodic_instructor_reports.models import PeriodicReportSchedule, ReportArtifact
+
+
+DEFAULT_COURSE_VERSION_PROVIDER = "periodic_instructor_reports.artifacts.CourseDataVersionProvider"
+DEFAULT_REPORT_ARTIFACT_STORE = "periodic_instructor_reports.artifacts.ReportStoreArtifactStore"
+
+
+class ArtifactKey(NamedTuple):
+    """
+    Identifies the report of a task call for a course at a version of the course's data.
+    """
+
+    task_path: str
+    artifact_name: str
+    course_id: str
+    arguments_hash: str
+    version: str
+
+
+class CourseVersionProvider:
+    """
+    Base class of course data version providers.
+    """
+
+    def get_version(self, course_id: str) -> str:
+        """
+        Return the version of the course's data, or an empty string if it is unknown.
+        """
+
+        raise NotImplementedError
+
+
+class CourseDataVersionProvider(CourseVersionProvider):
+    """
+    Course data version provider using the edX platform's course data.
+
+    The version changes if the course content is published, learners enroll or
+    unenroll, or the learners' grades are updated.
+    """
+
+    def get_version(self, course_id: str) -> str:
+        # pylint: disable=no-member
+        content_modified = get_course_overview_model().objects.filter(
+            id=course_id,
+        ).values_list("modified", flat=True).first()
+
+        if content_modified is None:
+            return ""
+
+        enrollments = get_course_enrollment_model().objects.filter(
+            course_id=course_id,
+            is_active=True,
+        ).aggregate(count=Count("id"), last_id=Max("id"))
+
+        grades_modified = get_persistent_course_grade_model().objects.filter(
+            course_id=course_id,
+        ).aggregate(modified=Max("modified"))["modified"]
+
+        return "|".join([
+            content_modified.isoformat(),
+            str(enrollments["count"]),
+            str(enrollments["last_id"]),
+            grades_modified.isoformat() if grades_modified else "",
+        ])
+
+
+class InMemoryCourseVersionProvider(CourseVersionProvider):
+    """
+    Course data version provider returning versions set in memory. Used by the tests.
+    """
+
+    versions: Dict[str, str] = {}
+
+    def get_version(self, course_id: str) -> str:
+        return self.versions.get(course_id, "")
+
+
+class ReportArtifactStore:
+    """
+    Base class of report artifact stores.
+    """
+
+    def list_artifacts(self, course_id: str, artifact_name: str, parent_dir: str, since: datetime) -> List[str]:
+        """
+        Return the paths of the course's report files of the given name in the folder, modified since
+        the given time.
+        """
+
+        raise NotImplementedError
+
+    def copy_artifact(self, path: str, parent_dir: str) -> None:
+        """
+        Copy the report file to the folder.
+        """
+
+        raise NotImplementedError
+
+
+class ReportStoreArtifactStore(ReportArtifactStore):
+    """
+    Report artifact store using the storage of the edX platform's instructor report store.
+    """
+
+    def __init__(self):
+        config_name = getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_REPORT_STORE_CONFIG", "GRADES_DOWNLOAD")
+        self.storage = get_report_store(config_name).storage
+
+    def list_artifacts(self, course_id: str, artifact_name: str, parent_dir: str, since: datetime) -> List[str]:
+        prefix = f"{get_course_filename_prefix(CourseKey.from_string(course_id))}_{artifact_name}_"
+
+        try:
+            _, filenames = self.storage.listdir(parent_dir)
+        except OSError:
+            return []
+
+        paths = [posixpath.join(parent_dir, filename) for filename in filenames if filename.startswith(prefix)]
+        return [path for path in paths if self.storage.get_modified_time(path) >= since]
+
+    def copy_artifact(self, path: str, parent_dir: str) -> None:
+        with self.storage.open(path) as artifact_file:
+            self.storage.save(posixpath.join(parent_dir, posixpath.basename(path)), artifact_file)
+
+
+class InMemoryReportArtifactStore(ReportArtifactStore):
+    """
+    Report artifact store keeping the report files in memory. Used by the tests.
+    """
+
+    # Mapping of file paths to (course ID, modification time) tuples, the file names start with the artifact name
+    files: Dict[str, Tuple[str, datetime]] = {}
+
+    def list_artifacts(self, course_id: str, artifact_name: str, parent_dir: str, since: datetime) -> List[str]:
+        return sorted(
+            path
+            for path, (file_course_id, modified) in self.files.items()
+            if posixpath.dirname(path) == parent_dir
+            and posixpath.basename(path).startswith(artifact_name)
+            and file_course_id == course_id
+            and modified >= since
+        )
+
+    def copy_artifact(self, path: str, parent_dir: str) -> None:
+        self.files[posixpath.join(parent_dir, posixpath.basename(path))] = (
+            self.files[path][0],
+            timezone.now(),
+        )
+
+
+def get_course_version_provider() -> CourseVersionProvider:
+    """
+    Return an instance of the configured course data version provider.
+    """
+
+    provider_path = getattr(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_COURSE_VERSION_PROVIDER",
+        DEFAULT_COURSE_VERSION_PROVIDER,
+    )
+
+    return import_string(provider_path)()
+
+
+def get_report_artifact_store() -> ReportArtifactStore:
+    """
+    Return an instance of the configured report artifact store.
+    """
+
+    store_path = getattr(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_REPORT_ARTIFACT_STORE",
+        DEFAULT_REPORT_ARTIFACT_STORE,
+    )
+
+    return import_string(store_path)()
+
+
+def get_arguments_hash(schedule: PeriodicReportSchedule) -> str:
+    """
+    Return the hash of the arguments and keyword arguments the schedule calls the report task with.
+    """
+
+    arguments = json.dumps([schedule.arguments, schedule.keyword_arguments], sort_keys=True, default=str)
+    return hashlib.sha1(arguments.encode("utf-8")).hexdigest()
+
+
+def get_artifact_key(schedule: PeriodicReportSchedule, course_id: object) -> Optional[ArtifactKey]:
+    """
+    Return the key of the schedule's report for the course, or `None` if the report cannot be cached.
+    """
+
+    if not schedule.task.artifact_name:
+        return None
+
+    version = get_course_version_provider().get_version(str(course_id))
+
+    if not version:
+        return None
+
+    return ArtifactKey(
+        schedule.task.path,
+        schedule.task.artifact_name,
+        str(course_id),
+        get_arguments_hash(schedule),
+        version,
+    )
+
+
+def reuse_artifact(key: ArtifactKey, upload_parent_dir: str) -> bool:
+    """
+    Make the cached report available in the upload folder, return whether it was reused.
+
+    The report is reused only if it was generated at the same version of the course's
+    data and all of its files still exist. The files of a report whose files were not
+    recorded yet are the files of the task's artifact name written since the call.
+    """
+
+    # pylint: disable=no-member
+    artifact = ReportArtifact.objects.filter(
+        task_path=key.task_path,
+        course_id=key.course_id,
+        arguments_hash=key.arguments_hash,
+    ).first()
+
+    paths = []
+    if artifact is not None and artifact.version == key.version:
+        store = get_report_artifact_store()
+        paths = store.list_artifacts(
+            key.course_id,
+            key.artifact_name,
+            artifact.upload_parent_dir,
+            artifact.generated_at,
+        )
+
+        if artifact.filenames:
+            paths = [path for path in paths if posixpath.basename(path) in artifact.filenames]
+            paths = paths if len(paths) == len(artifact.filenames) else []
+        elif paths:
+            ReportArtifact.objects.filter(id=artifact.id).update(
+                filenames=[posixpath.basename(path) for path in paths],
+            )
+
+    if not paths:
+        metrics.increment("artifact_cache.miss", task=key.task_path)
+        return False
+
+    if artifact.upload_parent_dir != upload_parent_dir:
+        for path in paths:
+            store.copy_artifact(path, upload_parent_dir)
+
+    ReportArtifact.objects.filter(id=artifact.id).update(hits=F("hits") + 1, last_used_at=timezone.now())
+    metrics.increment("artifact_cache.hit", task=key.task_path)
+
+    return True
+
+
+def record_artifact(key: ArtifactKey, upload_parent_dir: str, generated_at: datetime) -> None:
+    """
+    Record the report generated by a task call started at `generated_at`.
+
+    The names of the report files are recorded when the report is reused the first time,
+    because the files may be written after the call returned.
+    """
+
+    # pylint: disable=no-member
+    artifact, created = ReportArtifact.objects.get_or_create(
+        task_path=key.task_path,
+        course_id=key.course_id,
+        arguments_hash=key.arguments_hash,
+        defaults={
+            "version": key.version,
+            "upload_parent_dir": upload_parent_dir,
+            "generated_at": generated_at,
+            "last_used_at": generated_at,
+            "misses": 1,
+            "filenames": [],
+        },
+    )
+
+    if not created:
+        artifact.version = key.version
+        artifact.upload_parent_dir = upload_parent_dir
+        artifact.generated_at = generated_at
+        artifact.last_used_at = generated_at
+        artifact.misses += 1
+        artifact.filenames = []
+        artifact.save()
+
+
+def evict_artifacts(now: Optional[datetime] = None) -> int:
+    """
+    Evict the cached artifacts unused for too long and the least recently used ones over the limit.
+    """
+
+    now = now or timezone.now()
+    max_age = int(getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_ARTIFACT_CACHE_MAX_AGE", 2592000))
+    max_entries = int(getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_ARTIFACT_CACHE_MAX_ENTRIES", 10000))
+
+    # pylint: disable=no-member
+    expired_count, _ = ReportArtifact.objects.filter(
+        last_used_at__lt=now - timedelta(seconds=max_age),
+    ).delete()
+
+    overflow_ids = list(
+        ReportArtifact.objects.order_by("-last_used_at", "-id").values_list("id", flat=True)[max_entries:]
+    )
+    overflow_count, _ = ReportArtifact.objects.filter(id__in=overflow_ids).delete()
+
+    evicted_count = expired_count + overflow_count
+
+    if evicted_count:
+        metrics.increment("artifact_cache.evicted", evicted_count)
+
+    return evicted_count
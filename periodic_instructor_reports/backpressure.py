@@ -0,0 +1,129 @@
+"""
+Backpressure checks executed before dispatching periodic report tasks.
+
+When the queue consumed by the report workers is already backlogged, scheduling
+more reports makes the backlog grow and delays the interactive instructor reports
+as well. Before the periodic task wrapper calls a report task, it checks the depth
+of the task's queue using a queue depth probe, and defers or sheds the run if the
+thresholds configured on the `PeriodicReportTask` are exceeded.
+
+The probe is configured by the `PERIODIC_INSTRUCTOR_REPORTS_QUEUE_DEPTH_PROBE`
+setting. By default, the Celery broker is asked for the number of messages waiting
+in the queue.
+"""
+
+import logging
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from periodic_instructor_reports.models import PeriodicReportTask
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_DEPTH_PROBE = "periodic_instructor_reports.backpressure.CeleryBrokerQueueDepthProbe"
+
+DECISION_DISPATCH = "dispatch"
+DECISION_DEFER = "defer"
+DECISION_SHED = "shed"
+
+
+class QueueDepthProbe:
+    """
+    Base class of queue depth probes.
+    """
+
+    def get_depth(self, queue_name: str) -> int:
+        """
+        Return the number of messages waiting in the queue called `queue_name`.
+        """
+
+        raise NotImplementedError
+
+
+class CeleryBrokerQueueDepthProbe(QueueDepthProbe):
+    """
+    Queue depth probe asking the Celery broker for the queue's message count.
+    """
+
+    def get_depth(self, queue_name: str) -> int:
+        # pylint: disable=import-outside-toplevel
+        from celery import current_app
+
+        with current_app.connection_for_read() as connection:
+            with connection.channel() as channel:
+                return channel.queue_declare(queue=queue_name, passive=True).message_count
+
+
+class InMemoryQueueDepthProbe(QueueDepthProbe):
+    """
+    Queue depth probe returning depths set in memory. Used by the tests.
+    """
+
+    depths: Dict[str, int] = {}
+
+    def get_depth(self, queue_name: str) -> int:
+        return self.depths.get(queue_name, 0)
+
+
+def get_queue_depth_probe() -> QueueDepthProbe:
+    """
+    Return an instance of the configured queue depth probe.
+    """
+
+    probe_path = getattr(
+        settings, "PERIODIC_INSTRUCTOR_REPORTS_QUEUE_DEPTH_PROBE", DEFAULT_QUEUE_DEPTH_PROBE
+    )
+
+    return import_string(probe_path)()
+
+
+def get_queue_name(report_task: PeriodicReportTask) -> str:
+    """
+    Return the name of the queue the report task's messages are waiting in.
+    """
+
+    return report_task.queue_name or getattr(
+        settings, "PERIODIC_INSTRUCTOR_REPORTS_DEFAULT_QUEUE", "edx.lms.core.default"
+    )
+
+
+def get_queue_depth(queue_name: str) -> Optional[int]:
+    """
+    Return the depth of the given queue or `None` if it cannot be determined.
+    """
+
+    try:
+        return get_queue_depth_probe().get_depth(queue_name)
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.warning("Cannot determine the depth of queue %s: %s", queue_name, str(exc))
+        return None
+
+
+def check_backpressure(report_task: PeriodicReportTask, deferrals: int = 0) -> str:
+    """
+    Decide whether the report task can be dispatched based on the queue depth.
+
+    The run is shed if the queue depth reached the task's shed threshold, or if it
+    would be deferred but was already deferred the maximum number of times. If the
+    queue depth cannot be determined, the run is dispatched as usual.
+    """
+
+    if report_task.defer_queue_depth is None and report_task.shed_queue_depth is None:
+        return DECISION_DISPATCH
+
+    depth = get_queue_depth(get_queue_name(report_task))
+
+    if depth is None:
+        return DECISION_DISPATCH
+
+    if report_task.shed_queue_depth is not None and depth >= report_task.shed_queue_depth:
+        return DECISION_SHED
+
+    if report_task.defer_queue_depth is not None and depth >= report_task.defer_queue_depth:
+        max_deferrals = getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_BACKPRESSURE_MAX_DEFERRALS", 3)
+        return DECISION_SHED if deferrals >= int(max_deferrals) else DECISION_DEFER
+
+    return DECISION_DISPATCH
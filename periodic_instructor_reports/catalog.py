@@ -0,0 +1,280 @@
+"""
+Course catalog index used to resolve the course selectors of schedules.
+
+Instead of listing every course ID, schedules can select courses by organization
+(`org:ORG`) or by a shell-style pattern matched against the course ID (like
+`course-v1:ORG+*+2026*`). The selectors are resolved at every run, so new courses
+are picked up automatically.
+
+Resolving the selectors must not scan the whole catalog, hence the course IDs are
+kept sorted in the Django cache, which makes it possible to look up all course IDs
+starting with the selector's literal prefix using binary search. The index is
+updated incrementally with the courses changed since the last refresh, and fully
+rebuilt periodically to drop deleted courses.
+
+Cache backends limit the size of a value (memcached silently drops values over
+1 MB by default), so the sorted course IDs are split into shards of
+`PERIODIC_INSTRUCTOR_REPORTS_CATALOG_SHARD_SIZE` course IDs, stored under separate
+keys next to a small manifest. Every write stores the shards under new keys, so a
+reader never combines shards of different writes. If a shard cannot be written or
+is missing when the index is read, a warning is logged and the index is rebuilt.
+
+The course IDs are listed by a pluggable provider, configured by the
+`PERIODIC_INSTRUCTOR_REPORTS_COURSE_CATALOG_PROVIDER` setting. By default, the
+course overviews of the edX platform are used.
+"""
+
+import logging
+import uuid
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from fnmatch import fnmatchcase
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from periodic_instructor_reports.compat import get_course_overview_model
+
+
+DEFAULT_COURSE_CATALOG_PROVIDER = "periodic_instructor_reports.catalog.CourseOverviewCatalogProvider"
+INDEX_CACHE_KEY = "periodic_instructor_reports:catalog_index"
+ORG_SELECTOR_PREFIX = "org:"
+WILDCARD_CHARACTERS = "*?["
+
+logger = logging.getLogger(__name__)
+
+
+class CourseCatalogProvider:
+    """
+    Base class of course catalog providers.
+    """
+
+    def get_course_ids(self, modified_since: Optional[datetime] = None) -> List[str]:
+        """
+        Return the IDs of the courses, or only of those changed since `modified_since`.
+        """
+
+        raise NotImplementedError
+
+
+class CourseOverviewCatalogProvider(CourseCatalogProvider):
+    """
+    Course catalog provider listing the edX platform's course overviews.
+    """
+
+    def get_course_ids(self, modified_since: Optional[datetime] = None) -> List[str]:
+        course_overviews = get_course_overview_model().objects.all()
+
+        if modified_since:
+            course_overviews = course_overviews.filter(modified__gt=modified_since)
+
+        return [str(course_id) for course_id in course_overviews.values_list("id", flat=True)]
+
+
+class InMemoryCourseCatalogProvider(CourseCatalogProvider):
+    """
+    Course catalog provider listing courses set in memory. Used by the tests.
+    """
+
+    # List of (course ID, modification time) tuples
+    courses: List[Tuple[str, datetime]] = []
+
+    def get_course_ids(self, modified_since: Optional[datetime] = None) -> List[str]:
+        return [
+            course_id
+            for course_id, modified in self.courses
+            if modified_since is None or modified > modified_since
+        ]
+
+
+def get_course_catalog_provider() -> CourseCatalogProvider:
+    """
+    Return an instance of the configured course catalog provider.
+    """
+
+    provider_path = getattr(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_COURSE_CATALOG_PROVIDER",
+        DEFAULT_COURSE_CATALOG_PROVIDER,
+    )
+
+    return import_string(provider_path)()
+
+
+def build_index(now: datetime) -> dict:
+    """
+    Build the course catalog index from scratch.
+    """
+
+    return {
+        "course_ids": sorted(set(get_course_catalog_provider().get_course_ids())),
+        "refreshed_at": now,
+        "rebuilt_at": now,
+    }
+
+
+def refresh_index(index: dict, now: datetime) -> dict:
+    """
+    Add the courses changed since the last refresh to the course catalog index.
+    """
+
+    course_ids = index["course_ids"]
+    changed_course_ids = get_course_catalog_provider().get_course_ids(modified_since=index["refreshed_at"])
+
+    for course_id in changed_course_ids:
+        position = bisect_left(course_ids, course_id)
+
+        if position == len(course_ids) or course_ids[position] != course_id:
+            insort(course_ids, course_id)
+
+    index["refreshed_at"] = now
+    return index
+
+
+def get_shard_keys(manifest: dict) -> List[str]:
+    """
+    Return the cache keys of the shards of the course catalog index described by the manifest.
+    """
+
+    return [f"{INDEX_CACHE_KEY}:{manifest['version']}:{shard}" for shard in range(manifest["shard_count"])]
+
+
+def load_index() -> Optional[dict]:
+    """
+    Return the course catalog index stored in the cache, or `None` if it is not stored completely.
+    """
+
+    manifest = cache.get(INDEX_CACHE_KEY)
+
+    if manifest is None:
+        return None
+
+    shard_keys = get_shard_keys(manifest)
+    shards = cache.get_many(shard_keys)
+
+    if len(shards) != len(shard_keys):
+        logger.warning(
+            "Rebuilding the course catalog index, %s of its %s shards are missing from the cache",
+            len(shard_keys) - len(shards),
+            len(shard_keys),
+        )
+        return None
+
+    return {
+        "course_ids": [course_id for shard_key in shard_keys for course_id in shards[shard_key]],
+        "refreshed_at": manifest["refreshed_at"],
+        "rebuilt_at": manifest["rebuilt_at"],
+    }
+
+
+def store_index(index: dict, timeout: int) -> None:
+    """
+    Store the course catalog index in the cache, split into shards.
+    """
+
+    shard_size = int(getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_CATALOG_SHARD_SIZE", 5000))
+    course_ids = index["course_ids"]
+    manifest = {
+        "version": uuid.uuid4().hex,
+        "shard_count": (len(course_ids) + shard_size - 1) // shard_size,
+        "refreshed_at": index["refreshed_at"],
+        "rebuilt_at": index["rebuilt_at"],
+    }
+
+    shards = {
+        shard_key: course_ids[shard * shard_size:(shard + 1) * shard_size]
+        for shard, shard_key in enumerate(get_shard_keys(manifest))
+    }
+
+    failed_keys = cache.set_many(shards, timeout)
+
+    if failed_keys:
+        logger.warning(
+            "Could not store %s of the %s shards of the course catalog index in the cache, "
+            "consider decreasing PERIODIC_INSTRUCTOR_REPORTS_CATALOG_SHARD_SIZE",
+            len(failed_keys),
+            len(shards),
+        )
+        return
+
+    cache.set(INDEX_CACHE_KEY, manifest, timeout)
+
+
+def get_index() -> dict:
+    """
+    Return the course catalog index, refreshing or rebuilding it if it is outdated.
+    """
+
+    now = timezone.now()
+    refresh_interval = timedelta(
+        seconds=int(getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_CATALOG_REFRESH_SECONDS", 300))
+    )
+    rebuild_interval = timedelta(
+        seconds=int(getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_CATALOG_REBUILD_SECONDS", 86400))
+    )
+
+    index = load_index()
+
+    if index is None or now - index["rebuilt_at"] >= rebuild_interval:
+        index = build_index(now)
+    elif now - index["refreshed_at"] >= refresh_interval:
+        index = refresh_index(index, now)
+    else:
+        return index
+
+    # The index is rebuilt once it is older than the rebuild interval anyway
+    store_index(index, int(rebuild_interval.total_seconds()))
+    return index
+
+
+def get_course_ids_with_prefix(course_ids: List[str], prefix: str) -> List[str]:
+    """
+    Return the course IDs starting with the prefix from the sorted list of course IDs.
+    """
+
+    start = bisect_left(course_ids, prefix)
+    end = bisect_left(course_ids, prefix + "\U0010ffff")
+
+    return course_ids[start:end]
+
+
+def resolve_selector(selector: str, course_ids: List[str]) -> List[str]:
+    """
+    Return the course IDs matching the selector from the sorted list of course IDs.
+    """
+
+    if selector.startswith(ORG_SELECTOR_PREFIX):
+        org = selector[len(ORG_SELECTOR_PREFIX):]
+        return [
+            *get_course_ids_with_prefix(course_ids, f"course-v1:{org}+"),
+            *get_course_ids_with_prefix(course_ids, f"{org}/"),
+        ]
+
+    wildcard_positions = [selector.find(char) for char in WILDCARD_CHARACTERS if char in selector]
+    prefix = selector[:min(wildcard_positions)] if wildcard_positions else selector
+    candidates = get_course_ids_with_prefix(course_ids, prefix)
+
+    if not wildcard_positions:
+        return [course_id for course_id in candidates if course_id == selector]
+
+    return [course_id for course_id in candidates if fnmatchcase(course_id, selector)]
+
+
+def resolve_selectors(selectors: List[str]) -> List[str]:
+    """
+    Return the IDs of the courses matching any of the selectors, in catalog order.
+    """
+
+    if not selectors:
+        return []
+
+    course_ids = get_index()["course_ids"]
+    selected_course_ids = set()
+
+    for selector in selectors:
+        selected_course_ids.update(resolve_selector(selector, course_ids))
+
+    return sorted(selected_course_ids)
@@ -0,0 +1,77 @@
+"""
+Missed-run handling of periodic report schedules.
+
+After Celery beat or the workers were down, the `DatabaseScheduler` can send
+several overdue runs of the same schedule at once. To not generate the same
+reports several times in a row, every run triggered by beat claims the schedule
+by moving its `last_run_at` forward. A run arriving shortly after the schedule
+was claimed is a duplicate tick and it is dropped, so the missed runs collapse
+into one.
+
+If the schedule missed at least one run, its catch-up policy decides whether the
+collapsed run is executed or skipped. Catch-up runs are delayed by an offset
+derived from the schedule ID within `PERIODIC_INSTRUCTOR_REPORTS_CATCH_UP_SPREAD_SECONDS`,
+so schedules recovering at the same time do not start at once.
+"""
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from periodic_instructor_reports.models import PeriodicReportSchedule
+
+
+# Fraction of the interval a run may be early or late without being considered
+# a duplicate or a missed run.
+INTERVAL_TOLERANCE = 0.5
+
+CLAIM_RUN = "run"
+CLAIM_DUPLICATE = "duplicate"
+CLAIM_CATCH_UP = "catch_up"
+CLAIM_MISSED = "missed"
+
+
+def get_interval(schedule: PeriodicReportSchedule) -> timedelta:
+    """
+    Return the time between two runs of the schedule.
+    """
+
+    return timedelta(**{schedule.interval.period: schedule.interval.every})
+
+
+def get_catch_up_countdown(schedule: PeriodicReportSchedule) -> int:
+    """
+    Return the seconds the schedule's catch-up run is delayed by.
+
+    The offset is calculated using Fibonacci hashing of the schedule ID, so
+    schedules with consecutive IDs are spread evenly.
+    """
+
+    spread = int(getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_CATCH_UP_SPREAD_SECONDS", 900))
+    return (schedule.id * 2654435761) % 2 ** 32 * spread // 2 ** 32
+
+
+def claim_run(schedule: PeriodicReportSchedule, now: Optional[datetime] = None) -> str:
+    """
+    Claim the schedule for a run triggered by beat and return how to handle the run.
+    """
+
+    now = now or timezone.now()
+    previous_run_at = schedule.last_run_at
+    interval = get_interval(schedule)
+
+    if previous_run_at and now - previous_run_at < interval * INTERVAL_TOLERANCE:
+        return CLAIM_DUPLICATE
+
+    if not schedule.claim_last_run(previous_run_at, now):
+        return CLAIM_DUPLICATE
+
+    if previous_run_at and now - previous_run_at > interval * (1 + INTERVAL_TOLERANCE):
+        if schedule.catch_up_policy == PeriodicReportSchedule.CATCH_UP_NONE:
+            return CLAIM_MISSED
+
+        return CLAIM_CATCH_UP
+
+    return CLAIM_RUN
@@ -13,3 +13,63 @@ def get_ccx_model() -> object:
     from lms.djangoapps.ccx.models import CustomCourseForEdX
 
     return CustomCourseForEdX
+
+
+def get_course_overview_model() -> object:
+    """
+    Return CourseOverview model.
+    """
+
+    from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+
+    return CourseOverview
+
+
+def get_course_enrollment_model() -> object:
+    """
+    Return CourseEnrollment model.
+    """
+
+    from common.djangoapps.student.models import CourseEnrollment
+
+    return CourseEnrollment
+
+
+def get_persistent_course_grade_model() -> object:
+    """
+    Return PersistentCourseGrade model.
+    """
+
+    from lms.djangoapps.grades.models import PersistentCourseGrade
+
+    return PersistentCourseGrade
+
+
+def get_instructor_task_model() -> object:
+    """
+    Return InstructorTask model.
+    """
+
+    from lms.djangoapps.instructor_task.models import InstructorTask
+
+    return InstructorTask
+
+
+def get_report_store(config_name: str) -> object:
+    """
+    Return the instructor report store configured by the given setting name.
+    """
+
+    from lms.djangoapps.instructor_task.models import ReportStore
+
+    return ReportStore.from_config(config_name)
+
+
+def get_course_filename_prefix(course_id: object) -> str:
+    """
+    Return the prefix of the names of the report files generated for the course.
+    """
+
+    from common.djangoapps.util.file import course_filename_prefix_generator
+
+    return course_filename_prefix_generator(course_id)
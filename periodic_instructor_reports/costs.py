@@ -0,0 +1,183 @@
+"""
+Cost model of report task calls.
+
+The duration of a report task call depends heavily on the course: generating a
+report for a course with hundreds of thousands of learners takes magnitudes
+longer than for a small CCX. The periodic task wrapper keeps a rolling estimate
+of the call duration per task path and course, which is an exponentially weighted
+moving average smoothed by `PERIODIC_INSTRUCTOR_REPORTS_DURATION_SMOOTHING`.
+
+The estimates are used to call the longest running courses first, and to split
+the courses into batches of roughly equal total duration when the calls are fanned
+out to multiple workers.
+
+The edX platform's report functions, like `submit_calculate_grades_csv`, only
+submit an instructor task generating the report on another worker and return it,
+so the duration of their call is meaningless. For these calls, the submitted
+instructor task is recorded instead, and its duration, from its creation until it
+finished, is recorded when the estimates of the course are read the next time.
+"""
+
+import heapq
+from typing import Dict, Iterable, List
+
+from celery import states
+from django.conf import settings
+
+from periodic_instructor_reports.compat import get_instructor_task_model
+from periodic_instructor_reports.models import CourseReportDuration
+
+
+def get_duration_estimates(task_path: str, course_ids: Iterable[str]) -> Dict[str, float]:
+    """
+    Return the estimated call durations in seconds of the courses which have an estimate.
+
+    The durations of the instructor tasks finished since the last call are recorded first.
+    """
+
+    course_ids = list(course_ids)
+    record_finished_task_durations(task_path, course_ids)
+
+    # pylint: disable=no-member
+    durations = CourseReportDuration.objects.filter(
+        task_path=task_path,
+        course_id__in=course_ids,
+        estimate__isnull=False,
+    ).values_list("course_id", "estimate")
+
+    return dict(durations)
+
+
+def record_pending_task(task_path: str, course_id: str, task_id: str) -> None:
+    """
+    Record the instructor task submitted by a call, whose duration is recorded once it finished.
+    """
+
+    # pylint: disable=no-member
+    CourseReportDuration.objects.update_or_create(
+        task_path=task_path,
+        course_id=course_id,
+        defaults={"pending_task_id": task_id},
+    )
+
+
+def record_finished_task_durations(task_path: str, course_ids: List[str]) -> None:
+    """
+    Record the durations of the finished instructor tasks submitted for the courses.
+
+    Failed instructor tasks are forgotten without recording their duration.
+    """
+
+    # pylint: disable=no-member
+    pending_course_ids = dict(
+        CourseReportDuration.objects.filter(
+            task_path=task_path,
+            course_id__in=course_ids,
+        ).exclude(pending_task_id="").values_list("pending_task_id", "course_id")
+    )
+
+    if not pending_course_ids:
+        return
+
+    finished_tasks = get_instructor_task_model().objects.filter(
+        task_id__in=list(pending_course_ids),
+        task_state__in=states.READY_STATES,
+    ).values_list("task_id", "task_state", "created", "updated")
+
+    for task_id, task_state, created, updated in finished_tasks:
+        course_id = pending_course_ids[task_id]
+
+        if task_state == states.SUCCESS:
+            record_duration(task_path, course_id, (updated - created).total_seconds())
+
+        CourseReportDuration.objects.filter(
+            task_path=task_path,
+            course_id=course_id,
+            pending_task_id=task_id,
+        ).update(pending_task_id="")
+
+
+def record_duration(
+    task_path: str,
+    course_id: str,
+    duration: float,
+    lower_bound: bool = False,
+) -> CourseReportDuration:
+    """
+    Update the rolling duration estimate of the course with a measured call duration.
+
+    The duration of an interrupted call is only a lower bound of the actual duration, which
+    can raise the estimate but is not counted as a sample.
+    """
+
+    smoothing = float(getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_DURATION_SMOOTHING", 0.3))
+
+    # pylint: disable=no-member
+    course_duration, created = CourseReportDuration.objects.get_or_create(
+        task_path=task_path,
+        course_id=course_id,
+        defaults={"estimate": duration, "samples": 0 if lower_bound else 1},
+    )
+
+    if created:
+        return course_duration
+
+    if course_duration.estimate is None:
+        course_duration.estimate = duration
+        course_duration.samples = 0 if lower_bound else 1
+        course_duration.save()
+    elif lower_bound:
+        if duration > course_duration.estimate:
+            course_duration.estimate = duration
+            course_duration.save()
+    else:
+        course_duration.estimate = smoothing * duration + (1 - smoothing) * course_duration.estimate
+        course_duration.samples += 1
+        course_duration.save()
+
+    return course_duration
+
+
+def get_default_estimate(estimates: Dict[str, float]) -> float:
+    """
+    Return the estimate used for courses without history: the mean of the known estimates.
+    """
+
+    return sum(estimates.values()) / len(estimates) if estimates else 0.0
+
+
+def order_longest_first(course_ids: List[object], estimates: Dict[str, float]) -> List[object]:
+    """
+    Return the course IDs ordered by their estimated call duration, the longest first.
+
+    Courses with equal estimates keep their original order.
+    """
+
+    default_estimate = get_default_estimate(estimates)
+
+    return sorted(
+        course_ids,
+        key=lambda course_id: estimates.get(str(course_id), default_estimate),
+        reverse=True,
+    )
+
+
+def bin_pack(course_ids: List[object], estimates: Dict[str, float], slots: int) -> List[List[object]]:
+    """
+    Split the course IDs into at most `slots` batches with balanced total durations.
+
+    The longest processing time first heuristic is used: courses are taken longest
+    first and each one is put into the batch with the lowest total duration so far.
+    Empty batches are not returned.
+    """
+
+    default_estimate = get_default_estimate(estimates)
+    batches: List[List[object]] = [[] for _ in range(max(slots, 1))]
+    loads = [(0.0, index) for index in range(len(batches))]
+
+    for course_id in order_longest_first(course_ids, estimates):
+        load, index = heapq.heappop(loads)
+        batches[index].append(course_id)
+        heapq.heappush(loads, (load + estimates.get(str(course_id), default_estimate), index))
+
+    return [batch for batch in batches if batch]
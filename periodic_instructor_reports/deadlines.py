@@ -0,0 +1,183 @@
+"""
+Run deadlines and per-course time budgets of periodic report schedules.
+
+A stuck report task call could keep a worker busy for hours, blocking other
+schedules while the next runs of the schedule stack up. Schedules can limit the
+duration of a run by a deadline and the duration of every report task call by a
+course time budget.
+
+Courses not called before the run's deadline are not called late, but handed
+off to the next run, which calls them first. A call exceeding the course time
+budget, or the time left until the deadline, is interrupted by a soft time limit
+raising `CourseTimeBudgetExceeded` in the worker's main thread. Every timeout is
+recorded as a `ReportTimeout` with its course and elapsed time.
+
+The soft time limit takes over the process-wide `SIGALRM` handler, so the budget
+is enforced only for calls executed by the main thread of a worker process, as
+in Celery's prefork pool. Under the threads, gevent or eventlet pools the calls
+are not interrupted, and a warning is logged instead.
+"""
+
+import logging
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from celery.exceptions import SoftTimeLimitExceeded
+from django.db import transaction
+
+from periodic_instructor_reports import metrics
+from periodic_instructor_reports.models import PeriodicReportSchedule, ReportTimeout
+
+
+logger = logging.getLogger(__name__)
+
+
+class CourseTimeBudgetExceeded(SoftTimeLimitExceeded):
+    """
+    Raised when a report task call exceeds its time budget.
+    """
+
+
+def get_deadline(schedule: PeriodicReportSchedule, started_at: Optional[float] = None) -> Optional[float]:
+    """
+    Return the POSIX timestamp of the deadline of a run started at `started_at`, if any.
+    """
+
+    if not schedule.run_deadline:
+        return None
+
+    return (started_at or time.time()) + schedule.run_deadline
+
+
+def is_past_deadline(deadline: Optional[float]) -> bool:
+    """
+    Return whether the deadline of the run passed.
+    """
+
+    return deadline is not None and time.time() >= deadline
+
+
+def get_call_budget(schedule: PeriodicReportSchedule, deadline: Optional[float] = None) -> Optional[float]:
+    """
+    Return the seconds a report task call may take: the course time budget or the time left until
+    the deadline, whichever is shorter.
+    """
+
+    budgets = []
+
+    if schedule.course_time_budget:
+        budgets.append(float(schedule.course_time_budget))
+
+    if deadline is not None:
+        budgets.append(max(deadline - time.time(), 0.001))
+
+    return min(budgets, default=None)
+
+
+@contextmanager
+def time_budget(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Interrupt the code executed within the context manager after the given seconds.
+
+    The code is interrupted by raising `CourseTimeBudgetExceeded` from a `SIGALRM`
+    handler. Signals are handled by the main thread only, hence the time budget is
+    not enforced elsewhere, neither on platforms without `setitimer`.
+    """
+
+    if not seconds:
+        yield
+        return
+
+    if not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        logger.warning(
+            "Cannot enforce the time budget of %.0f seconds outside of the main thread of a worker process, "
+            "use Celery's prefork pool to interrupt calls exceeding their budget",
+            seconds,
+        )
+        yield
+        return
+
+    # pylint: disable=unused-argument
+    def interrupt(signum, frame):
+        raise CourseTimeBudgetExceeded(f"Time budget of {seconds:.0f} seconds exceeded")
+
+    previous_handler = signal.signal(signal.SIGALRM, interrupt)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous_handler)
+
+
+def order_carried_over_first(course_ids: List[object], carried_over_course_ids: List[str]) -> List[object]:
+    """
+    Return the course IDs with the ones carried over from the previous run first.
+    """
+
+    carried_over = set(carried_over_course_ids)
+
+    return (
+        [course_id for course_id in course_ids if str(course_id) in carried_over]
+        + [course_id for course_id in course_ids if str(course_id) not in carried_over]
+    )
+
+
+def clear_carried_over(schedule: PeriodicReportSchedule) -> None:
+    """
+    Forget the courses carried over to the run which is starting.
+    """
+
+    if schedule.carried_over_course_ids:
+        # pylint: disable=no-member
+        PeriodicReportSchedule.objects.filter(id=schedule.id).update(carried_over_course_ids=[])
+
+
+def record_timeout(schedule: PeriodicReportSchedule, course_id: object, elapsed: float, kind: str) -> None:
+    """
+    Record a report task call which did not finish in time.
+    """
+
+    # pylint: disable=no-member
+    ReportTimeout.objects.create(schedule_id=schedule.id, course_id=str(course_id), elapsed=elapsed, kind=kind)
+    metrics.increment(f"timeout.{kind}", schedule=schedule.id, course=str(course_id))
+
+
+def carry_over(schedule: PeriodicReportSchedule, course_ids: List[object], elapsed: float) -> None:
+    """
+    Hand off the courses not called before the deadline to the next run.
+
+    Fanned out batches may carry over courses at the same time, so the courses are
+    added to the carried over ones while the schedule's row is locked.
+    """
+
+    course_ids = [str(course_id) for course_id in course_ids]
+
+    # pylint: disable=no-member
+    with transaction.atomic():
+        carried_over_course_ids = PeriodicReportSchedule.objects.select_for_update().filter(
+            id=schedule.id,
+        ).values_list("carried_over_course_ids", flat=True).get()
+
+        carried_over = set(carried_over_course_ids)
+        PeriodicReportSchedule.objects.filter(id=schedule.id).update(
+            carried_over_course_ids=[
+                *carried_over_course_ids,
+                *(course_id for course_id in course_ids if course_id not in carried_over),
+            ],
+        )
+
+    ReportTimeout.objects.bulk_create([
+        ReportTimeout(
+            schedule_id=schedule.id,
+            course_id=course_id,
+            elapsed=elapsed,
+            kind=ReportTimeout.KIND_DEADLINE,
+        )
+        for course_id in course_ids
+    ])
+    metrics.increment(f"timeout.{ReportTimeout.KIND_DEADLINE}", len(course_ids), schedule=schedule.id)
@@ -0,0 +1,291 @@
+"""
+Weighted fair sharing of the report capacity.
+
+Without fair sharing, an owner or organization with hundreds of schedules can
+occupy the workers for hours, while a single schedule of someone else waits
+behind them. When `PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_GROUP_BY` is set, the
+periodic task wrapper does not call the report task directly, but enqueues the
+calls as `PendingReportCall`s grouped by the schedule's owner or the course's
+organization. At most `PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_CONCURRENCY` calls
+are running at a time, and every free slot is given to the group with the lowest
+number of running calls relative to its weight, set by
+`PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_WEIGHTS`.
+
+A course is not enqueued again while a call of the same schedule for it is still
+waiting or running, so the queue does not grow if the runs are triggered faster
+than the calls are started. The calls are started by one dispatcher at a time,
+otherwise concurrent dispatchers could start more calls than the concurrency limit.
+
+A running call sends a heartbeat from a background thread, so calls running for
+hours keep their slot. Only calls without a heartbeat for longer than
+`PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_CALL_TIMEOUT` seconds, like the calls of
+crashed workers, are dropped and their slots given to other calls.
+
+The time a call waited in the queue is recorded per group, which shows whether
+the weights work as expected.
+"""
+
+import logging
+import threading
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Deque, Dict, Iterator, List
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils import timezone
+
+from periodic_instructor_reports import metrics
+from periodic_instructor_reports.models import PendingReportCall, PeriodicReportSchedule
+from periodic_instructor_reports.tracing import get_current_context
+
+
+logger = logging.getLogger(__name__)
+
+GROUP_BY_OWNER = "owner"
+GROUP_BY_ORG = "org"
+
+DISPATCH_LOCK_KEY = "periodic_instructor_reports:fair_share:dispatch_lock"
+DISPATCH_REQUESTED_KEY = "periodic_instructor_reports:fair_share:dispatch_requested"
+
+# Seconds after the dispatcher lock expires if the dispatcher holding it crashed
+DISPATCH_LOCK_TIMEOUT = 60
+
+
+def get_group_by() -> str:
+    """
+    Return what the calls are grouped by, or an empty string if fair sharing is disabled.
+    """
+
+    return getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_GROUP_BY", "")
+
+
+def get_group(schedule: PeriodicReportSchedule, course_id: object) -> str:
+    """
+    Return the fair share group of the schedule's report task call for the course.
+    """
+
+    if get_group_by() == GROUP_BY_ORG:
+        return course_id.org
+
+    return schedule.owner.username
+
+
+def get_weight(group: str) -> float:
+    """
+    Return the share of the capacity the group is entitled to relative to the other groups.
+    """
+
+    weights = getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_WEIGHTS", {})
+    return float(weights.get(group, 1))
+
+
+def enqueue_report_calls(schedule: PeriodicReportSchedule, course_ids: List[object]) -> int:
+    """
+    Enqueue the schedule's report task calls for the courses in the given order.
+
+    Courses with a call of the schedule still waiting or running are skipped. Return the
+    number of enqueued calls.
+    """
+
+    trace_context = get_current_context()
+    traceparent = trace_context.to_traceparent() if trace_context else ""
+
+    # pylint: disable=no-member
+    queued_course_ids = set(
+        PendingReportCall.objects.filter(schedule_id=schedule.id).values_list("course_id", flat=True)
+    )
+
+    pending_calls = PendingReportCall.objects.bulk_create([
+        PendingReportCall(
+            schedule_id=schedule.id,
+            course_id=str(course_id),
+            group=get_group(schedule, course_id),
+            traceparent=traceparent,
+        )
+        for course_id in course_ids
+        if str(course_id) not in queued_course_ids
+    ])
+
+    skipped_count = len(course_ids) - len(pending_calls)
+
+    if skipped_count:
+        logger.info("Skipped %s courses of schedule %s already in the queue", skipped_count, schedule.id)
+
+    return len(pending_calls)
+
+
+def select_report_calls(
+    pending_calls: List[PendingReportCall],
+    running_counts: Dict[str, int],
+    slots: int,
+) -> List[PendingReportCall]:
+    """
+    Select the pending calls to start in the free slots.
+
+    Every slot is given to the group with the lowest number of running calls
+    divided by its weight. The calls of a group are started in the order they
+    were enqueued, ties between groups are broken by the enqueue order as well.
+    """
+
+    queues: Dict[str, Deque[PendingReportCall]] = OrderedDict()
+    for pending_call in pending_calls:
+        queues.setdefault(pending_call.group, deque()).append(pending_call)
+
+    running_counts = Counter(running_counts)
+    selected_calls = []
+
+    while len(selected_calls) < slots and queues:
+        group = min(
+            queues,
+            key=lambda group: (running_counts[group] / get_weight(group), queues[group][0].id),
+        )
+        selected_calls.append(queues[group].popleft())
+        running_counts[group] += 1
+
+        if not queues[group]:
+            del queues[group]
+
+    return selected_calls
+
+
+def get_pending_calls(slots: int) -> List[PendingReportCall]:
+    """
+    Return the oldest pending calls of every group which could be started in the free slots.
+
+    At most `slots` calls of a group can be started, so the rest of the queue is not loaded.
+    """
+
+    # pylint: disable=no-member
+    pending_calls = PendingReportCall.objects.filter(status=PendingReportCall.STATUS_PENDING)
+    groups = pending_calls.order_by().values_list("group", flat=True).distinct()
+
+    return sorted(
+        (
+            pending_call
+            for group in groups
+            for pending_call in pending_calls.filter(group=group).order_by("id")[:slots]
+        ),
+        key=lambda pending_call: pending_call.id,
+    )
+
+
+def start_report_calls() -> List[PendingReportCall]:
+    """
+    Mark the pending calls fitting into the free capacity as running and return them.
+
+    Only one dispatcher starts calls at a time. A dispatcher finding another one in
+    progress leaves a request behind, which makes the one in progress start calls
+    again once it finished, so freed slots are not missed.
+    """
+
+    started_calls = []
+    cache.set(DISPATCH_REQUESTED_KEY, True, DISPATCH_LOCK_TIMEOUT)
+
+    while cache.get(DISPATCH_REQUESTED_KEY) and cache.add(DISPATCH_LOCK_KEY, True, DISPATCH_LOCK_TIMEOUT):
+        try:
+            cache.delete(DISPATCH_REQUESTED_KEY)
+            started_calls.extend(start_report_calls_in_free_slots())
+        finally:
+            cache.delete(DISPATCH_LOCK_KEY)
+
+    return started_calls
+
+
+def start_report_calls_in_free_slots() -> List[PendingReportCall]:
+    """
+    Mark the pending calls fitting into the free slots as running and return them.
+
+    Must be called only by the dispatcher holding the dispatcher lock.
+    """
+
+    now = timezone.now()
+    concurrency = int(getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_CONCURRENCY", 4))
+    call_timeout = get_call_timeout()
+
+    # pylint: disable=no-member
+    running_calls = PendingReportCall.objects.filter(status=PendingReportCall.STATUS_RUNNING)
+
+    # Calls of crashed workers would occupy their slots forever
+    stale_calls = running_calls.filter(heartbeat_at__lt=now - timedelta(seconds=call_timeout))
+    stale_count, _ = stale_calls.delete()
+
+    if stale_count:
+        logger.warning("Dropped %s running calls without a heartbeat for %s seconds", stale_count, call_timeout)
+
+    running_counts = Counter(running_calls.values_list("group", flat=True))
+    free_slots = concurrency - sum(running_counts.values())
+
+    if free_slots <= 0:
+        return []
+
+    started_calls = []
+
+    for pending_call in select_report_calls(get_pending_calls(free_slots), running_counts, free_slots):
+        # Another dispatcher may have started the call meanwhile
+        started = PendingReportCall.objects.filter(
+            id=pending_call.id,
+            status=PendingReportCall.STATUS_PENDING,
+        ).update(status=PendingReportCall.STATUS_RUNNING, started_at=now, heartbeat_at=now)
+
+        if started:
+            metrics.observe(
+                "fair_share.queue_wait",
+                (now - pending_call.enqueued_at).total_seconds(),
+                group=pending_call.group,
+            )
+            started_calls.append(pending_call)
+
+    return started_calls
+
+
+def get_call_timeout() -> int:
+    """
+    Return the seconds after a running call without a heartbeat is dropped.
+    """
+
+    return int(getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_CALL_TIMEOUT", 3600))
+
+
+def heartbeat_report_call(pending_call_id: int) -> bool:
+    """
+    Refresh the heartbeat of the running call and return `False` if it was dropped meanwhile.
+    """
+
+    # pylint: disable=no-member
+    return PendingReportCall.objects.filter(
+        id=pending_call_id,
+        status=PendingReportCall.STATUS_RUNNING,
+    ).update(heartbeat_at=timezone.now()) > 0
+
+
+@contextmanager
+def keep_report_call_alive(pending_call_id: int) -> Iterator[None]:
+    """
+    Send the heartbeat of the running call from a background thread while the code within the
+    context manager runs.
+    """
+
+    stopped = threading.Event()
+    interval = get_call_timeout() / 3
+
+    def heartbeat():
+        try:
+            while not stopped.wait(interval):
+                if not heartbeat_report_call(pending_call_id):
+                    logger.error("Running call %s was dropped while the report task was called", pending_call_id)
+                    return
+        finally:
+            # The thread's own database connections are not closed by Django
+            connections.close_all()
+
+    thread = threading.Thread(target=heartbeat, name=f"report-call-{pending_call_id}-heartbeat", daemon=True)
+    thread.start()
+
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
@@ -0,0 +1,422 @@
+"""
+Single-flight locks preventing overlapping runs of the same schedule.
+
+If a schedule's run takes longer than its interval, Celery beat sends the next
+run while the previous one is still in progress. To not generate the same
+reports twice in parallel, the periodic task wrapper holds a per-schedule lock
+while it is running. The lock expires after `PERIODIC_INSTRUCTOR_REPORTS_LOCK_TIMEOUT`
+seconds unless it is renewed by the heartbeat of the run holding it, so a crashed
+worker cannot block the schedule forever.
+
+The run renews the lock from a background thread while a report task call is in
+progress, so calls taking longer than the lock timeout do not lose the lock.
+
+The lock is stored by a pluggable backend configured by the
+`PERIODIC_INSTRUCTOR_REPORTS_LOCK_BACKEND` setting. The database backend is used
+by default. The cache backend renews and releases the lock by reading it and then
+writing or deleting it, because the Django cache API has no compare-and-set. If the
+lock expires between the two steps, the old holder could overwrite or delete the
+lock of a new holder, so the cache backend is safe only if runs never outlive the
+lock timeout.
+"""
+
+import logging
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Iterator, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connections, transaction
+from django.db.models import DateTimeField, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from periodic_instructor_reports.models import PeriodicReportLock
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCK_BACKEND = "periodic_instructor_reports.locks.DatabaseLockBackend"
+
+
+class LockHolder(NamedTuple):
+    """
+    Details of the run holding a schedule's lock.
+    """
+
+    token: str
+    acquired_at: datetime
+
+
+class LockBackend:
+    """
+    Base class of single-flight lock backends.
+    """
+
+    def acquire(self, schedule_id: int, token: str, timeout: int) -> bool:
+        """
+        Acquire the lock of the schedule unless it is held by another run.
+        """
+
+        raise NotImplementedError
+
+    def renew(self, schedule_id: int, token: str, timeout: int) -> bool:
+        """
+        Extend the expiry of the lock if it is still held using the given token.
+        """
+
+        raise NotImplementedError
+
+    def release(self, schedule_id: int, token: str) -> bool:
+        """
+        Release the lock held using the given token.
+
+        Return `True` if a rerun was requested while the lock was held.
+        """
+
+        raise NotImplementedError
+
+    def start_batches(self, schedule_id: int, token: str, count: int, timeout: int) -> bool:
+        """
+        Hand the lock over to `count` fanned out batches and extend its expiry by `timeout`.
+
+        Return `False` if the lock is not held using the given token anymore.
+        """
+
+        raise NotImplementedError
+
+    def finish_batch(self, schedule_id: int, token: str) -> int:
+        """
+        Count a fanned out batch as finished and return the number of batches still pending.
+        """
+
+        raise NotImplementedError
+
+    def get_holder(self, schedule_id: int) -> Optional[LockHolder]:
+        """
+        Return the details of the run holding the lock, if any.
+        """
+
+        raise NotImplementedError
+
+    def request_rerun(self, schedule_id: int) -> bool:
+        """
+        Ask the run holding the lock to run once more after it finished.
+
+        Return `False` if the lock is not held anymore.
+        """
+
+        raise NotImplementedError
+
+
+class CacheLockBackend(LockBackend):
+    """
+    Lock backend storing the locks in the Django cache.
+
+    Renewing and releasing the lock are not atomic, see the module's documentation.
+    """
+
+    key_prefix = "periodic_instructor_reports:lock"
+
+    def get_lock_key(self, schedule_id: int) -> str:
+        """
+        Return the cache key of the schedule's lock.
+        """
+
+        return f"{self.key_prefix}:{schedule_id}"
+
+    def get_rerun_key(self, schedule_id: int) -> str:
+        """
+        Return the cache key of the schedule's rerun request.
+        """
+
+        return f"{self.key_prefix}:{schedule_id}:rerun"
+
+    def get_batches_key(self, schedule_id: int) -> str:
+        """
+        Return the cache key of the number of the schedule's pending fanned out batches.
+        """
+
+        return f"{self.key_prefix}:{schedule_id}:batches"
+
+    def acquire(self, schedule_id: int, token: str, timeout: int) -> bool:
+        now = timezone.now()
+        value = {"token": token, "acquired_at": now, "expires_at": now + timedelta(seconds=timeout)}
+        return cache.add(self.get_lock_key(schedule_id), value, timeout)
+
+    def renew(self, schedule_id: int, token: str, timeout: int) -> bool:
+        key = self.get_lock_key(schedule_id)
+        value = cache.get(key)
+
+        if not value or value["token"] != token:
+            return False
+
+        # The lock may have been extended for pending batches, which must not be shortened
+        now = timezone.now()
+        value["expires_at"] = max(value["expires_at"], now + timedelta(seconds=timeout))
+        timeout = (value["expires_at"] - now).total_seconds()
+
+        cache.set(key, value, timeout)
+        cache.touch(self.get_rerun_key(schedule_id), timeout)
+        cache.touch(self.get_batches_key(schedule_id), timeout)
+
+        return True
+
+    def release(self, schedule_id: int, token: str) -> bool:
+        key = self.get_lock_key(schedule_id)
+        value = cache.get(key)
+
+        if not value or value["token"] != token:
+            return False
+
+        rerun_requested = bool(cache.get(self.get_rerun_key(schedule_id)))
+        cache.delete_many([key, self.get_rerun_key(schedule_id), self.get_batches_key(schedule_id)])
+
+        return rerun_requested
+
+    def start_batches(self, schedule_id: int, token: str, count: int, timeout: int) -> bool:
+        if not self.renew(schedule_id, token, timeout):
+            return False
+
+        cache.set(self.get_batches_key(schedule_id), count, timeout)
+        return True
+
+    def finish_batch(self, schedule_id: int, token: str) -> int:
+        value = cache.get(self.get_lock_key(schedule_id))
+
+        if not value or value["token"] != token:
+            return 0
+
+        try:
+            return max(cache.decr(self.get_batches_key(schedule_id)), 0)
+        except ValueError:
+            return 0
+
+    def get_holder(self, schedule_id: int) -> Optional[LockHolder]:
+        value = cache.get(self.get_lock_key(schedule_id))
+        return LockHolder(value["token"], value["acquired_at"]) if value else None
+
+    def request_rerun(self, schedule_id: int) -> bool:
+        if not cache.get(self.get_lock_key(schedule_id)):
+            return False
+
+        cache.set(self.get_rerun_key(schedule_id), True, get_lock_timeout())
+        return True
+
+
+class DatabaseLockBackend(LockBackend):
+    """
+    Lock backend storing the locks as `PeriodicReportLock` rows.
+    """
+
+    def acquire(self, schedule_id: int, token: str, timeout: int) -> bool:
+        now = timezone.now()
+
+        # pylint: disable=no-member
+        PeriodicReportLock.objects.filter(schedule_id=schedule_id, expires_at__lte=now).delete()
+
+        try:
+            with transaction.atomic():
+                PeriodicReportLock.objects.create(
+                    schedule_id=schedule_id,
+                    token=token,
+                    acquired_at=now,
+                    expires_at=now + timedelta(seconds=timeout),
+                )
+        except IntegrityError:
+            return False
+
+        return True
+
+    def renew(self, schedule_id: int, token: str, timeout: int) -> bool:
+        now = timezone.now()
+
+        # The lock may have been extended for pending batches, which must not be shortened
+        # pylint: disable=no-member
+        return PeriodicReportLock.objects.filter(
+            schedule_id=schedule_id,
+            token=token,
+            expires_at__gt=now,
+        ).update(
+            expires_at=Greatest("expires_at", Value(now + timedelta(seconds=timeout), output_field=DateTimeField())),
+        ) > 0
+
+    def release(self, schedule_id: int, token: str) -> bool:
+        # pylint: disable=no-member
+        with transaction.atomic():
+            lock = PeriodicReportLock.objects.select_for_update().filter(
+                schedule_id=schedule_id,
+                token=token,
+            ).first()
+
+            if lock is None:
+                return False
+
+            lock.delete()
+
+        return lock.rerun_requested
+
+    def start_batches(self, schedule_id: int, token: str, count: int, timeout: int) -> bool:
+        now = timezone.now()
+
+        # pylint: disable=no-member
+        return PeriodicReportLock.objects.filter(
+            schedule_id=schedule_id,
+            token=token,
+            expires_at__gt=now,
+        ).update(
+            expires_at=Greatest("expires_at", Value(now + timedelta(seconds=timeout), output_field=DateTimeField())),
+            pending_batches=count,
+        ) > 0
+
+    def finish_batch(self, schedule_id: int, token: str) -> int:
+        # pylint: disable=no-member
+        with transaction.atomic():
+            lock = PeriodicReportLock.objects.select_for_update().filter(
+                schedule_id=schedule_id,
+                token=token,
+            ).first()
+
+            if lock is None:
+                return 0
+
+            lock.pending_batches = max(lock.pending_batches - 1, 0)
+            lock.save(update_fields=["pending_batches"])
+
+        return lock.pending_batches
+
+    def get_holder(self, schedule_id: int) -> Optional[LockHolder]:
+        # pylint: disable=no-member
+        lock = PeriodicReportLock.objects.filter(
+            schedule_id=schedule_id,
+            expires_at__gt=timezone.now(),
+        ).first()
+
+        return LockHolder(lock.token, lock.acquired_at) if lock else None
+
+    def request_rerun(self, schedule_id: int) -> bool:
+        # pylint: disable=no-member
+        return PeriodicReportLock.objects.filter(
+            schedule_id=schedule_id,
+            expires_at__gt=timezone.now(),
+        ).update(rerun_requested=True) > 0
+
+
+def get_lock_backend() -> LockBackend:
+    """
+    Return an instance of the configured lock backend.
+    """
+
+    backend_path = getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_LOCK_BACKEND", DEFAULT_LOCK_BACKEND)
+    return import_string(backend_path)()
+
+
+def get_lock_timeout() -> int:
+    """
+    Return the number of seconds after a lock expires unless it is renewed.
+    """
+
+    return int(getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_LOCK_TIMEOUT", 600))
+
+
+def get_fan_out_lock_timeout() -> int:
+    """
+    Return the number of seconds fanned out batches may wait in the queue before the lock expires.
+    """
+
+    return int(getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_FAN_OUT_LOCK_TIMEOUT", 21600))
+
+
+class ScheduleLock:
+    """
+    Single-flight lock of a `PeriodicReportSchedule`.
+    """
+
+    def __init__(self, schedule_id: int, backend: Optional[LockBackend] = None, token: Optional[str] = None):
+        self.schedule_id = schedule_id
+        self.backend = backend or get_lock_backend()
+        self.token = token or uuid.uuid4().hex
+
+    def acquire(self) -> bool:
+        """
+        Try to acquire the lock and return `True` on success.
+        """
+
+        return self.backend.acquire(self.schedule_id, self.token, get_lock_timeout())
+
+    def heartbeat(self) -> bool:
+        """
+        Renew the lock and return `False` if the lock was lost in the meantime.
+        """
+
+        return self.backend.renew(self.schedule_id, self.token, get_lock_timeout())
+
+    @contextmanager
+    def keep_alive(self) -> Iterator[None]:
+        """
+        Renew the lock from a background thread while the code within the context manager runs.
+        """
+
+        stopped = threading.Event()
+        interval = get_lock_timeout() / 3
+
+        def renew():
+            try:
+                while not stopped.wait(interval):
+                    if not self.heartbeat():
+                        logger.error("Lost lock of schedule %s while a report task call was running", self.schedule_id)
+                        return
+            finally:
+                # The thread's own database connections are not closed by Django
+                connections.close_all()
+
+        thread = threading.Thread(target=renew, name=f"schedule-{self.schedule_id}-lock", daemon=True)
+        thread.start()
+
+        try:
+            yield
+        finally:
+            stopped.set()
+            thread.join()
+
+    def release(self) -> bool:
+        """
+        Release the lock and return `True` if a rerun was requested meanwhile.
+        """
+
+        return self.backend.release(self.schedule_id, self.token)
+
+    def start_batches(self, count: int) -> bool:
+        """
+        Hand the lock over to fanned out batches, the last one finishing releases it.
+
+        The lock is extended to not expire while the batches wait in the queue, and it is
+        renewed by every batch while it is running.
+        """
+
+        return self.backend.start_batches(self.schedule_id, self.token, count, get_fan_out_lock_timeout())
+
+    def finish_batch(self) -> int:
+        """
+        Count a fanned out batch as finished and return the number of batches still pending.
+        """
+
+        return self.backend.finish_batch(self.schedule_id, self.token)
+
+    def get_holder(self) -> Optional[LockHolder]:
+        """
+        Return the details of the run currently holding the lock.
+        """
+
+        return self.backend.get_holder(self.schedule_id)
+
+    def request_rerun(self) -> bool:
+        """
+        Coalesce a new run into the run currently holding the lock.
+        """
+
+        return self.backend.request_rerun(self.schedule_id)
@@ -0,0 +1,162 @@
+"""
+Management command simulating the report load caused by the periodic report schedules.
+"""
+
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from periodic_instructor_reports.catchup import get_interval
+from periodic_instructor_reports.costs import get_default_estimate, get_duration_estimates
+from periodic_instructor_reports.fairshare import get_group_by
+from periodic_instructor_reports.models import PeriodicReportSchedule
+from periodic_instructor_reports.simulation import (
+    SECONDS_PER_HOUR,
+    ScheduleSpec,
+    get_jobs,
+    get_peak_concurrency,
+    get_required_workers,
+    get_task_durations,
+    simulate,
+)
+from periodic_instructor_reports.tasks import get_target_course_ids
+
+
+class Command(BaseCommand):
+    """
+    Simulate the periodic report schedules over a number of days in virtual time.
+
+    Example:
+        ./manage.py lms simulate_report_capacity --days 7 --workers 4 --latency-target 1800
+    """
+
+    help = "Simulate the load of the periodic report schedules to plan the worker capacity."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=1, help="Number of days to simulate.")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of workers executing the reports. Defaults to the required workers.",
+        )
+        parser.add_argument(
+            "--latency-target",
+            type=float,
+            default=SECONDS_PER_HOUR,
+            help="Maximum seconds a report task may wait for a free worker.",
+        )
+        parser.add_argument(
+            "--default-duration",
+            type=float,
+            default=60.0,
+            help="Seconds of a report call if neither the history nor the model knows the course.",
+        )
+        parser.add_argument(
+            "--duration-model",
+            default=None,
+            help="""Path of a JSON file mapping course IDs to report call durations in seconds,
+            overriding the measured durations. The "default" key overrides the default duration.""",
+        )
+
+    def load_duration_model(self, path: str) -> dict:
+        """
+        Load the report call durations from a JSON file.
+        """
+
+        try:
+            with open(path) as duration_model_file:
+                return json.load(duration_model_file)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot load the duration model {path}: {exc}") from exc
+
+    def get_schedule_specs(self, duration_model: dict, default_duration: float) -> list:
+        """
+        Return the simulated schedules with the durations of the tasks their runs produce.
+        """
+
+        # The simulation starts at midnight, so the simulated hours are the hours of the day
+        start = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        fair_share = bool(get_group_by())
+        schedule_specs = []
+
+        # pylint: disable=no-member
+        schedules = PeriodicReportSchedule.objects.select_related("task", "interval", "celery_task")
+
+        for schedule in schedules:
+            if schedule.celery_task and not schedule.celery_task.enabled:
+                continue
+
+            course_ids = [str(course_id) for course_id in get_target_course_ids(schedule)]
+            estimates = get_duration_estimates(schedule.task.path, course_ids)
+            fallback = duration_model.get(
+                "default",
+                get_default_estimate(estimates) or default_duration,
+            )
+            call_durations = {
+                course_id: float(duration_model.get(course_id, estimates.get(course_id, fallback)))
+                for course_id in course_ids
+            }
+
+            interval = get_interval(schedule).total_seconds()
+            offset = (schedule.last_run_at - start).total_seconds() if schedule.last_run_at else 0.0
+
+            if interval > 0:
+                schedule_specs.append(ScheduleSpec(
+                    schedule_id=schedule.id,
+                    interval=interval,
+                    offset=offset,
+                    task_durations=get_task_durations(
+                        call_durations,
+                        schedule.fan_out_slots,
+                        fair_share,
+                    ),
+                    skip_overlapping=schedule.overlap_policy == PeriodicReportSchedule.OVERLAP_SKIP,
+                    fair_share=fair_share,
+                ))
+
+        return schedule_specs
+
+    def handle(self, *args, **options):
+        days = options["days"]
+        latency_target = options["latency_target"]
+        duration_model = {}
+
+        if options["duration_model"]:
+            duration_model = self.load_duration_model(options["duration_model"])
+
+        schedule_specs = self.get_schedule_specs(duration_model, options["default_duration"])
+        jobs = get_jobs(schedule_specs, days)
+        fair_share_concurrency = None
+
+        if get_group_by():
+            fair_share_concurrency = int(getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_CONCURRENCY", 4))
+
+        required_workers = get_required_workers(jobs, latency_target, fair_share_concurrency)
+        workers = options["workers"] or max(required_workers, 1)
+        result = simulate(jobs, workers, fair_share_concurrency)
+        worker_hours_per_day = sum(result.busy_seconds_by_hour) / SECONDS_PER_HOUR / days
+
+        self.stdout.write(f"Simulated {len(schedule_specs)} schedules over {days} day(s)")
+        self.stdout.write(f"Report tasks: {len(jobs)}")
+        self.stdout.write(f"Report tasks skipped as overlapping with {workers} worker(s): {result.skipped_jobs}")
+
+        if fair_share_concurrency:
+            self.stdout.write(f"Fair-share concurrency: {fair_share_concurrency} report calls")
+
+        self.stdout.write("Runs of schedules with the coalesce overlap policy are simulated as queued")
+        self.stdout.write(f"Worker-hours per day: {worker_hours_per_day:.2f}")
+        self.stdout.write(f"Peak concurrent report tasks: {get_peak_concurrency(jobs)}")
+        self.stdout.write(f"Worst-case queue wait with {workers} worker(s): {result.max_wait:.0f}s")
+        self.stdout.write(f"Mean queue wait with {workers} worker(s): {result.mean_wait:.0f}s")
+        self.stdout.write(
+            f"Workers required for a {latency_target:.0f} seconds latency target: {required_workers}"
+        )
+        self.stdout.write(f"Average busy workers by hour of day (UTC) with {workers} worker(s):")
+
+        for hour, busy_seconds in enumerate(result.busy_seconds_by_hour):
+            busy_workers = busy_seconds / SECONDS_PER_HOUR / days
+            bar = "#" * round(busy_workers / workers * 40)
+            self.stdout.write(f"  {hour:02d}:00 {busy_workers:6.2f} {bar}")
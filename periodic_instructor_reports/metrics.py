@@ -0,0 +1,112 @@
+"""
+Metrics recording for periodic instructor reports.
+
+Metrics are sent to a pluggable backend which is configured by the
+`PERIODIC_INSTRUCTOR_REPORTS_METRICS_BACKEND` setting. By default, metrics are
+written to the log, so operators can pick them up using their log pipeline. The
+in-memory backend is used by the tests to assert on the recorded metrics.
+"""
+
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METRICS_BACKEND = "periodic_instructor_reports.metrics.LoggingMetricsBackend"
+
+
+class MetricsBackend:
+    """
+    Base class of metrics backends.
+    """
+
+    def increment(self, name: str, value: int = 1, tags: Optional[dict] = None) -> None:
+        """
+        Increment the counter called `name` by `value`.
+        """
+
+        raise NotImplementedError
+
+    def observe(self, name: str, value: float, tags: Optional[dict] = None) -> None:
+        """
+        Record a single observation (like a duration) of the metric called `name`.
+        """
+
+        raise NotImplementedError
+
+
+class LoggingMetricsBackend(MetricsBackend):
+    """
+    Metrics backend writing every metric to the log.
+    """
+
+    def increment(self, name: str, value: int = 1, tags: Optional[dict] = None) -> None:
+        logger.info("metric=%s type=counter value=%s tags=%s", name, value, tags or {})
+
+    def observe(self, name: str, value: float, tags: Optional[dict] = None) -> None:
+        logger.info("metric=%s type=observation value=%s tags=%s", name, value, tags or {})
+
+
+class InMemoryMetricsBackend(MetricsBackend):
+    """
+    Metrics backend keeping every metric in memory. Used by the tests.
+    """
+
+    def __init__(self):
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.observations: Dict[str, List[Tuple[float, dict]]] = defaultdict(list)
+
+    def increment(self, name: str, value: int = 1, tags: Optional[dict] = None) -> None:
+        self.counters[name] += value
+
+    def observe(self, name: str, value: float, tags: Optional[dict] = None) -> None:
+        self.observations[name].append((value, tags or {}))
+
+    def reset(self) -> None:
+        """
+        Forget every recorded metric.
+        """
+
+        self.counters.clear()
+        self.observations.clear()
+
+
+_backends: Dict[str, MetricsBackend] = {}
+
+
+def get_metrics_backend() -> MetricsBackend:
+    """
+    Return the configured metrics backend instance.
+
+    Backend instances are created once per process and reused afterwards.
+    """
+
+    backend_path = getattr(
+        settings, "PERIODIC_INSTRUCTOR_REPORTS_METRICS_BACKEND", DEFAULT_METRICS_BACKEND
+    )
+
+    if backend_path not in _backends:
+        _backends[backend_path] = import_string(backend_path)()
+
+    return _backends[backend_path]
+
+
+def increment(name: str, value: int = 1, **tags) -> None:
+    """
+    Increment the counter called `name` using the configured backend.
+    """
+
+    get_metrics_backend().increment(name, value, tags)
+
+
+def observe(name: str, value: float, **tags) -> None:
+    """
+    Record an observation of the metric called `name` using the configured backend.
+    """
+
+    get_metrics_backend().observe(name, value, tags)
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('periodic_instructor_reports', '0003_auto_20210723_0330'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='periodicreporttask',
+            name='defer_queue_depth',
+            field=models.PositiveIntegerField(blank=True, help_text='Defer the periodic run if at least this many messages are waiting in the\n        queue. Leave empty to never defer.\n        ', null=True),
+        ),
+        migrations.AddField(
+            model_name='periodicreporttask',
+            name='queue_name',
+            field=models.CharField(blank=True, default='', help_text='Name of the Celery queue the report task is executed from. Used to check the\n        queue depth before dispatching. If empty, the default queue will be checked.\n        ', max_length=254),
+        ),
+        migrations.AddField(
+            model_name='periodicreporttask',
+            name='shed_queue_depth',
+            field=models.PositiveIntegerField(blank=True, help_text='Skip the periodic run if at least this many messages are waiting in the\n        queue. Leave empty to never skip.\n        ', null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('periodic_instructor_reports', '0004_backpressure_thresholds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='periodicreportschedule',
+            name='overlap_policy',
+            field=models.CharField(choices=[('skip', 'skip'), ('queue', 'queue'), ('coalesce', 'coalesce')], default='skip', help_text='Define what happens if the schedule is triggered while its previous run is\n        still in progress: skip the new run, queue it behind the current one, or coalesce it\n        into the current one, which is executed once more after it finished.\n        ', max_length=32),
+        ),
+        migrations.CreateModel(
+            name='PeriodicReportLock',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(help_text='Token identifying the run holding the lock.', max_length=32)),
+                ('acquired_at', models.DateTimeField(help_text='The time the lock was acquired.')),
+                ('expires_at', models.DateTimeField(help_text='The lock is released at this time unless renewed.')),
+                ('rerun_requested', models.BooleanField(default=False, help_text='Indicates if a new run was coalesced into the run holding the lock.')),
+                ('schedule', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='periodic_instructor_reports.periodicreportschedule')),
+            ],
+            options={
+                'verbose_name': 'Periodic report lock',
+                'verbose_name_plural': 'Periodic report locks',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('periodic_instructor_reports', '0005_single_flight_lock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='periodicreportschedule',
+            name='catch_up_policy',
+            field=models.CharField(choices=[('one', 'one'), ('none', 'none')], default='one', help_text='Define what happens if runs were missed, for example due to a downtime: the\n        missed runs are collapsed into one run, or skipped until the next regular run.\n        ', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='periodicreportschedule',
+            name='last_run_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='The time the schedule was last triggered by Celery beat.', null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('periodic_instructor_reports', '0006_missed_run_catch_up'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='periodicreportschedule',
+            name='fan_out_slots',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Number of worker slots the report task calls are distributed across. The\n        courses are split into batches of roughly equal estimated duration, each executed by a\n        separate Celery task. If set to 0, the calls are executed by the periodic task itself.\n        '),
+        ),
+        migrations.CreateModel(
+            name='CourseReportDuration',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_path', models.CharField(help_text='Python path of the called task.', max_length=254)),
+                ('course_id', models.CharField(help_text='Course or CCX course ID.', max_length=255)),
+                ('estimate', models.FloatField(help_text='Estimated call duration in seconds.')),
+                ('samples', models.PositiveIntegerField(default=0, help_text='Number of measured calls the estimate is based on.')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Course report duration',
+                'verbose_name_plural': 'Course report durations',
+                'unique_together': {('task_path', 'course_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:12
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('periodic_instructor_reports', '0007_course_report_duration'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingReportCall',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course_id', models.CharField(help_text='Course or CCX course ID.', max_length=255)),
+                ('group', models.CharField(db_index=True, help_text='The owner or organization sharing the report capacity.', max_length=254)),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('running', 'running')], db_index=True, default='pending', max_length=32)),
+                ('enqueued_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='periodic_instructor_reports.periodicreportschedule')),
+            ],
+            options={
+                'verbose_name': 'Pending report call',
+                'verbose_name_plural': 'Pending report calls',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:13
+
+from django.db import migrations
+import jsonfield.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('periodic_instructor_reports', '0008_pending_report_call'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='periodicreportschedule',
+            name='course_selectors',
+            field=jsonfield.fields.JSONField(blank=True, default=[], help_text='List of course selectors resolved at every run, in addition to the course IDs.\n        A selector is either "org:ORG" selecting every course of the organization, or a pattern\n        matched against the course IDs, like "course-v1:ORG+*+2026*".\n        '),
+        ),
+        migrations.AlterField(
+            model_name='periodicreportschedule',
+            name='course_ids',
+            field=jsonfield.fields.JSONField(blank=True, default=[], help_text='List of course and CCX course IDs to run the reports against.'),
+        ),
+    ]
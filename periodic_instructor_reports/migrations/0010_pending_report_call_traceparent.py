@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('periodic_instructor_reports', '0009_course_selectors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pendingreportcall',
+            name='traceparent',
+            field=models.CharField(blank=True, default='', help_text='Trace context of the run which enqueued the call.', max_length=55),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('periodic_instructor_reports', '0010_pending_report_call_traceparent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='periodicreporttask',
+            name='cache_artifacts',
+            field=models.BooleanField(default=False, help_text="Reuse the last report of a course instead of generating it again if the course's\n        content, enrollments and grades did not change since. Enable only for reports based on\n        these data.\n        "),
+        ),
+        migrations.CreateModel(
+            name='ReportArtifact',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_path', models.CharField(help_text='Python path of the called task.', max_length=254)),
+                ('course_id', models.CharField(help_text='Course or CCX course ID.', max_length=255)),
+                ('arguments_hash', models.CharField(help_text='Hash of the arguments and keyword arguments the task was called with.', max_length=40)),
+                ('version', models.CharField(help_text="Version of the course's data the report is based on.", max_length=255)),
+                ('upload_parent_dir', models.CharField(blank=True, help_text='Folder the report was uploaded to.', max_length=255)),
+                ('generated_at', models.DateTimeField(help_text='Time the report task was called.')),
+                ('last_used_at', models.DateTimeField(db_index=True, help_text='Time the report was generated or reused.')),
+                ('hits', models.PositiveIntegerField(default=0, help_text='Number of runs reusing the report.')),
+                ('misses', models.PositiveIntegerField(default=0, help_text='Number of runs generating the report.')),
+            ],
+            options={
+                'verbose_name': 'Report artifact',
+                'verbose_name_plural': 'Report artifacts',
+                'unique_together': {('task_path', 'course_id', 'arguments_hash')},
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+import jsonfield.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('periodic_instructor_reports', '0011_report_artifact'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='periodicreportschedule',
+            name='carried_over_course_ids',
+            field=jsonfield.fields.JSONField(blank=True, default=list, editable=False, help_text='Courses not called before the deadline of the previous run.'),
+        ),
+        migrations.AddField(
+            model_name='periodicreportschedule',
+            name='course_time_budget',
+            field=models.PositiveIntegerField(blank=True, help_text='Seconds a report task call may take for a course before it is interrupted.\n        Leave empty for no limit.\n        ', null=True),
+        ),
+        migrations.AddField(
+            model_name='periodicreportschedule',
+            name='run_deadline',
+            field=models.PositiveIntegerField(blank=True, help_text='Seconds a run may take. Courses not called by then are handed off to the next\n        run, which calls them first. Leave empty for no deadline.\n        ', null=True),
+        ),
+        migrations.CreateModel(
+            name='ReportTimeout',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('course_id', models.CharField(db_index=True, help_text='Course or CCX course ID.', max_length=255)),
+                ('kind', models.CharField(choices=[('budget', 'Course time budget'), ('deadline', 'Run deadline')], help_text='The limit which was exceeded.', max_length=32)),
+                ('elapsed', models.FloatField(help_text='Seconds elapsed since the call started if the course time budget was exceeded,\n        or since the run started if the run deadline passed.\n        ')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='periodic_instructor_reports.periodicreportschedule')),
+            ],
+            options={
+                'verbose_name': 'Report timeout',
+                'verbose_name_plural': 'Report timeouts',
+            },
+        ),
+    ]
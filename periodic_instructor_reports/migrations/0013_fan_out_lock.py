@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('periodic_instructor_reports', '0012_run_deadline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='periodicreportlock',
+            name='pending_batches',
+            field=models.PositiveIntegerField(default=0, help_text='Number of fanned out batches of the run which did not finish yet.'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:34
+
+from django.db import migrations, models
+import jsonfield.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('periodic_instructor_reports', '0013_fan_out_lock'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='periodicreporttask',
+            name='artifact_name',
+            field=models.CharField(blank=True, help_text='Name of the report files the task generates, following the course in the file\n        names, like "grade_report" or "problem_grade_report". Identifies the task\'s reports among\n        the other reports of the course in the same folder.\n        ', max_length=254),
+        ),
+        migrations.AddField(
+            model_name='reportartifact',
+            name='filenames',
+            field=jsonfield.fields.JSONField(default=list, help_text='Names of the report files the task call generated.'),
+        ),
+        migrations.AlterField(
+            model_name='periodicreporttask',
+            name='cache_artifacts',
+            field=models.BooleanField(default=False, help_text="Reuse the last report of a course instead of generating it again if the course's\n        content, enrollments and grades did not change since. Enable only for reports based on\n        these data. Requires the artifact name.\n        "),
+        ),
+    ]
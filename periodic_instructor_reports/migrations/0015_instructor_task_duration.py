@@ -0,0 +1,23 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('periodic_instructor_reports', '0014_report_artifact_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursereportduration',
+            name='pending_task_id',
+            field=models.CharField(blank=True, help_text='ID of the instructor task submitted by the last call, whose duration is not recorded yet.', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='coursereportduration',
+            name='estimate',
+            field=models.FloatField(help_text='Estimated duration of generating the report in seconds: the duration of the call,\n        or of the instructor task it submitted. Empty until the first submitted instructor task finished.\n        ', null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 3.2.25 on 2026-10-19 14:42
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def set_heartbeat_of_running_calls(apps, schema_editor):
+    """
+    Count the heartbeat of the calls already running from their start.
+    """
+
+    PendingReportCall = apps.get_model('periodic_instructor_reports', 'PendingReportCall')
+    PendingReportCall.objects.filter(started_at__isnull=False).update(heartbeat_at=F('started_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('periodic_instructor_reports', '0015_instructor_task_duration'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pendingreportcall',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, help_text='The time the running call was started or last reported being alive. Running calls\n        without a heartbeat for longer than the fair share call timeout are dropped.\n        ', null=True),
+        ),
+        migrations.RunPython(set_heartbeat_of_running_calls, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,9 @@ This module contains all the models which are needed to easily schedule periodic
 instructor reports from the Django admin UI.
 """
 
+from datetime import datetime
+from typing import Optional
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils.translation import gettext_lazy as _
@@ -34,6 +37,43 @@ class PeriodicReportTask(models.Model):
         default=False,
         help_text="Indicates if the task requires a requests as a first parameter.",
     )
+    queue_name = models.CharField(
+        max_length=254,
+        default="",
+        blank=True,
+        help_text="""Name of the Celery queue the report task is executed from. Used to check the
+        queue depth before dispatching. If empty, the default queue will be checked.
+        """,
+    )
+    defer_queue_depth = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="""Defer the periodic run if at least this many messages are waiting in the
+        queue. Leave empty to never defer.
+        """,
+    )
+    shed_queue_depth = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="""Skip the periodic run if at least this many messages are waiting in the
+        queue. Leave empty to never skip.
+        """,
+    )
+    cache_artifacts = models.BooleanField(
+        default=False,
+        help_text="""Reuse the last report of a course instead of generating it again if the course's
+        content, enrollments and grades did not change since. Enable only for reports based on
+        these data. Requires the artifact name.
+        """,
+    )
+    artifact_name = models.CharField(
+        max_length=254,
+        blank=True,
+        help_text="""Name of the report files the task generates, following the course in the file
+        names, like "grade_report" or "problem_grade_report". Identifies the task's reports among
+        the other reports of the course in the same folder.
+        """,
+    )
 
     def __str__(self) -> str:
         return f"{self.name} ({self.path})"
@@ -60,6 +100,24 @@ class PeriodicReportSchedule(models.Model):
         (STRUCTURE_FLAT, STRUCTURE_FLAT),
     )
 
+    OVERLAP_SKIP = "skip"
+    OVERLAP_QUEUE = "queue"
+    OVERLAP_COALESCE = "coalesce"
+
+    OVERLAP_POLICIES = (
+        (OVERLAP_SKIP, OVERLAP_SKIP),
+        (OVERLAP_QUEUE, OVERLAP_QUEUE),
+        (OVERLAP_COALESCE, OVERLAP_COALESCE),
+    )
+
+    CATCH_UP_ONE = "one"
+    CATCH_UP_NONE = "none"
+
+    CATCH_UP_POLICIES = (
+        (CATCH_UP_ONE, CATCH_UP_ONE),
+        (CATCH_UP_NONE, CATCH_UP_NONE),
+    )
+
     task = models.ForeignKey("PeriodicReportTask", on_delete=models.CASCADE)
     owner = models.ForeignKey(
         User,
@@ -78,7 +136,15 @@ class PeriodicReportSchedule(models.Model):
         default=list(),
         help_text="List of course and CCX course IDs to run the reports against.",
         null=False,
-        blank=False,
+        blank=True,
+    )
+    course_selectors = JSONField(
+        default=list(),
+        blank=True,
+        help_text="""List of course selectors resolved at every run, in addition to the course IDs.
+        A selector is either "org:ORG" selecting every course of the organization, or a pattern
+        matched against the course IDs, like "course-v1:ORG+*+2026*".
+        """,
     )
     arguments = JSONField(
         default=list(),
@@ -114,11 +180,267 @@ class PeriodicReportSchedule(models.Model):
         default=STRUCTURE_REGULAR,
         help_text="Define the folder structure during upload.",
     )
+    overlap_policy = models.CharField(
+        choices=OVERLAP_POLICIES,
+        max_length=32,
+        default=OVERLAP_SKIP,
+        help_text="""Define what happens if the schedule is triggered while its previous run is
+        still in progress: skip the new run, queue it behind the current one, or coalesce it
+        into the current one, which is executed once more after it finished.
+        """,
+    )
+    catch_up_policy = models.CharField(
+        choices=CATCH_UP_POLICIES,
+        max_length=32,
+        default=CATCH_UP_ONE,
+        help_text="""Define what happens if runs were missed, for example due to a downtime: the
+        missed runs are collapsed into one run, or skipped until the next regular run.
+        """,
+    )
+    fan_out_slots = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="""Number of worker slots the report task calls are distributed across. The
+        courses are split into batches of roughly equal estimated duration, each executed by a
+        separate Celery task. If set to 0, the calls are executed by the periodic task itself.
+        """,
+    )
+    run_deadline = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="""Seconds a run may take. Courses not called by then are handed off to the next
+        run, which calls them first. Leave empty for no deadline.
+        """,
+    )
+    course_time_budget = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="""Seconds a report task call may take for a course before it is interrupted.
+        Leave empty for no limit.
+        """,
+    )
+    last_run_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="The time the schedule was last triggered by Celery beat.",
+    )
+    carried_over_course_ids = JSONField(
+        default=list,
+        blank=True,
+        editable=False,
+        help_text="Courses not called before the deadline of the previous run.",
+    )
 
     def __str__(self) -> str:
         return f"{self.task} ({self.interval})"
 
+    def claim_last_run(self, previous_run_at: Optional[datetime], run_at: datetime) -> bool:
+        """
+        Move the last run time of the schedule forward unless another run did it already.
+        """
+
+        # pylint: disable=no-member
+        claimed = PeriodicReportSchedule.objects.filter(
+            id=self.id,
+            last_run_at=previous_run_at,
+        ).update(last_run_at=run_at) > 0
+
+        if claimed:
+            self.last_run_at = run_at
+
+        return claimed
+
     # pylint: disable=missing-class-docstring,too-few-public-methods
     class Meta:
         verbose_name = _("Periodic report schedule")
         verbose_name_plural = _("Periodic report schedules")
+
+
+class PeriodicReportLock(models.Model):
+    """
+    Single-flight lock of a `PeriodicReportSchedule` used by the database lock backend.
+
+    A schedule has at most one lock. The lock is held by the run that created it until
+    the run releases it or the lock expires.
+    """
+
+    schedule = models.OneToOneField("PeriodicReportSchedule", on_delete=models.CASCADE)
+    token = models.CharField(max_length=32, help_text="Token identifying the run holding the lock.")
+    acquired_at = models.DateTimeField(help_text="The time the lock was acquired.")
+    expires_at = models.DateTimeField(help_text="The lock is released at this time unless renewed.")
+    rerun_requested = models.BooleanField(
+        default=False,
+        help_text="Indicates if a new run was coalesced into the run holding the lock.",
+    )
+    pending_batches = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of fanned out batches of the run which did not finish yet.",
+    )
+
+    def __str__(self) -> str:
+        return f"{self.schedule} (expires at {self.expires_at})"
+
+    # pylint: disable=missing-class-docstring,too-few-public-methods
+    class Meta:
+        verbose_name = _("Periodic report lock")
+        verbose_name_plural = _("Periodic report locks")
+
+
+class CourseReportDuration(models.Model):
+    """
+    Rolling estimate of the duration of a report task call for a course.
+
+    The estimates are updated after every call made by the periodic task wrapper
+    and used to order and distribute the calls of the upcoming runs. If the call
+    only submitted an instructor task, the duration of the instructor task is
+    recorded once it finished.
+    """
+
+    task_path = models.CharField(max_length=254, help_text="Python path of the called task.")
+    course_id = models.CharField(max_length=255, help_text="Course or CCX course ID.")
+    estimate = models.FloatField(
+        null=True,
+        help_text="""Estimated duration of generating the report in seconds: the duration of the call,
+        or of the instructor task it submitted. Empty until the first submitted instructor task finished.
+        """,
+    )
+    samples = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of measured calls the estimate is based on.",
+    )
+    pending_task_id = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="ID of the instructor task submitted by the last call, whose duration is not recorded yet.",
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.course_id} ({self.task_path})"
+
+    # pylint: disable=missing-class-docstring,too-few-public-methods
+    class Meta:
+        verbose_name = _("Course report duration")
+        verbose_name_plural = _("Course report durations")
+        unique_together = ["task_path", "course_id"]
+
+
+class ReportArtifact(models.Model):
+    """
+    Report generated for a course at a version of the course's data.
+
+    The periodic task wrapper reuses the report instead of generating it again
+    while the course's data version is unchanged.
+    """
+
+    task_path = models.CharField(max_length=254, help_text="Python path of the called task.")
+    course_id = models.CharField(max_length=255, help_text="Course or CCX course ID.")
+    arguments_hash = models.CharField(
+        max_length=40,
+        help_text="Hash of the arguments and keyword arguments the task was called with.",
+    )
+    version = models.CharField(max_length=255, help_text="Version of the course's data the report is based on.")
+    upload_parent_dir = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Folder the report was uploaded to.",
+    )
+    generated_at = models.DateTimeField(help_text="Time the report task was called.")
+    last_used_at = models.DateTimeField(db_index=True, help_text="Time the report was generated or reused.")
+    hits = models.PositiveIntegerField(default=0, help_text="Number of runs reusing the report.")
+    misses = models.PositiveIntegerField(default=0, help_text="Number of runs generating the report.")
+    filenames = JSONField(default=list, help_text="Names of the report files the task call generated.")
+
+    def __str__(self) -> str:
+        return f"{self.course_id} ({self.task_path})"
+
+    # pylint: disable=missing-class-docstring,too-few-public-methods
+    class Meta:
+        verbose_name = _("Report artifact")
+        verbose_name_plural = _("Report artifacts")
+        unique_together = ["task_path", "course_id", "arguments_hash"]
+
+
+class ReportTimeout(models.Model):
+    """
+    Report task call of a schedule which did not finish in time.
+
+    A call either exceeded the schedule's course time budget and was interrupted, or
+    was not started before the schedule's run deadline and was handed off to the
+    next run.
+    """
+
+    KIND_BUDGET = "budget"
+    KIND_DEADLINE = "deadline"
+
+    KINDS = (
+        (KIND_BUDGET, "Course time budget"),
+        (KIND_DEADLINE, "Run deadline"),
+    )
+
+    schedule = models.ForeignKey("PeriodicReportSchedule", on_delete=models.CASCADE)
+    course_id = models.CharField(max_length=255, db_index=True, help_text="Course or CCX course ID.")
+    kind = models.CharField(choices=KINDS, max_length=32, help_text="The limit which was exceeded.")
+    elapsed = models.FloatField(
+        help_text="""Seconds elapsed since the call started if the course time budget was exceeded,
+        or since the run started if the run deadline passed.
+        """,
+    )
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self) -> str:
+        return f"{self.course_id} ({self.kind}, {self.elapsed:.0f}s)"
+
+    # pylint: disable=missing-class-docstring,too-few-public-methods
+    class Meta:
+        verbose_name = _("Report timeout")
+        verbose_name_plural = _("Report timeouts")
+
+
+class PendingReportCall(models.Model):
+    """
+    Report task call of a schedule waiting for its fair share of the report capacity.
+
+    Calls are created by the periodic task wrapper when fair sharing is enabled and
+    deleted once the report task was called.
+    """
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+
+    STATUSES = (
+        (STATUS_PENDING, STATUS_PENDING),
+        (STATUS_RUNNING, STATUS_RUNNING),
+    )
+
+    schedule = models.ForeignKey("PeriodicReportSchedule", on_delete=models.CASCADE)
+    course_id = models.CharField(max_length=255, help_text="Course or CCX course ID.")
+    group = models.CharField(
+        max_length=254,
+        db_index=True,
+        help_text="The owner or organization sharing the report capacity.",
+    )
+    status = models.CharField(choices=STATUSES, max_length=32, default=STATUS_PENDING, db_index=True)
+    enqueued_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="""The time the running call was started or last reported being alive. Running calls
+        without a heartbeat for longer than the fair share call timeout are dropped.
+        """,
+    )
+    traceparent = models.CharField(
+        max_length=55,
+        blank=True,
+        default="",
+        help_text="Trace context of the run which enqueued the call.",
+    )
+
+    def __str__(self) -> str:
+        return f"{self.course_id} ({self.group}, {self.status})"
+
+    # pylint: disable=missing-class-docstring,too-few-public-methods
+    class Meta:
+        verbose_name = _("Pending report call")
+        verbose_name_plural = _("Pending report calls")
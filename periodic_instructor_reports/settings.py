@@ -42,3 +42,160 @@ def plugin_settings(settings):
         "CELERYBEAT_SCHEDULER",
         default_val="django_celery_beat.schedulers:DatabaseScheduler",
     )
+
+    # Backend used to record metrics, like deferred or skipped runs.
+    settings.PERIODIC_INSTRUCTOR_REPORTS_METRICS_BACKEND = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_METRICS_BACKEND",
+        default_val="periodic_instructor_reports.metrics.LoggingMetricsBackend",
+    )
+
+    # Probe used to determine the depth of the report tasks' queue before dispatching.
+    settings.PERIODIC_INSTRUCTOR_REPORTS_QUEUE_DEPTH_PROBE = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_QUEUE_DEPTH_PROBE",
+        default_val="periodic_instructor_reports.backpressure.CeleryBrokerQueueDepthProbe",
+    )
+
+    # Queue checked for report tasks that have no queue name set.
+    settings.PERIODIC_INSTRUCTOR_REPORTS_DEFAULT_QUEUE = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_DEFAULT_QUEUE",
+        default_val="edx.lms.core.default",
+    )
+
+    # Seconds to wait before retrying a deferred run and the number of deferrals before a run
+    # is skipped entirely.
+    settings.PERIODIC_INSTRUCTOR_REPORTS_BACKPRESSURE_DEFER_SECONDS = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_BACKPRESSURE_DEFER_SECONDS",
+        default_val=300,
+    )
+    settings.PERIODIC_INSTRUCTOR_REPORTS_BACKPRESSURE_MAX_DEFERRALS = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_BACKPRESSURE_MAX_DEFERRALS",
+        default_val=3,
+    )
+
+    # Backend storing the single-flight locks of the schedules, and the seconds after a lock expires
+    # unless it is renewed.
+    settings.PERIODIC_INSTRUCTOR_REPORTS_LOCK_BACKEND = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_LOCK_BACKEND",
+        default_val="periodic_instructor_reports.locks.DatabaseLockBackend",
+    )
+    settings.PERIODIC_INSTRUCTOR_REPORTS_LOCK_TIMEOUT = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_LOCK_TIMEOUT",
+        default_val=600,
+    )
+
+    # Seconds the lock of a fanned out run is kept while its batches wait in the queue.
+    settings.PERIODIC_INSTRUCTOR_REPORTS_FAN_OUT_LOCK_TIMEOUT = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_FAN_OUT_LOCK_TIMEOUT",
+        default_val=21600,
+    )
+
+    # Catch-up runs of schedules which missed runs are spread within this many seconds.
+    settings.PERIODIC_INSTRUCTOR_REPORTS_CATCH_UP_SPREAD_SECONDS = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_CATCH_UP_SPREAD_SECONDS",
+        default_val=900,
+    )
+
+    # Weight of the latest measured call duration in the rolling duration estimates.
+    settings.PERIODIC_INSTRUCTOR_REPORTS_DURATION_SMOOTHING = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_DURATION_SMOOTHING",
+        default_val=0.3,
+    )
+
+    # Share the report capacity between the schedules' owners ("owner") or the courses'
+    # organizations ("org") by weight. Leave empty to call the report tasks directly.
+    settings.PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_GROUP_BY = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_GROUP_BY",
+        default_val="",
+    )
+    settings.PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_WEIGHTS = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_WEIGHTS",
+        default_val={},
+    )
+    settings.PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_CONCURRENCY = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_CONCURRENCY",
+        default_val=4,
+    )
+
+    # Seconds after a running call without a heartbeat is considered lost and its slot is freed.
+    # Running calls send a heartbeat every third of this time, so it does not limit their duration.
+    settings.PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_CALL_TIMEOUT = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_CALL_TIMEOUT",
+        default_val=3600,
+    )
+
+    # Provider listing the courses the schedules' course selectors are resolved against, and the
+    # seconds after the cached course index is refreshed with changed courses or fully rebuilt.
+    settings.PERIODIC_INSTRUCTOR_REPORTS_COURSE_CATALOG_PROVIDER = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_COURSE_CATALOG_PROVIDER",
+        default_val="periodic_instructor_reports.catalog.CourseOverviewCatalogProvider",
+    )
+    settings.PERIODIC_INSTRUCTOR_REPORTS_CATALOG_REFRESH_SECONDS = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_CATALOG_REFRESH_SECONDS",
+        default_val=300,
+    )
+    settings.PERIODIC_INSTRUCTOR_REPORTS_CATALOG_REBUILD_SECONDS = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_CATALOG_REBUILD_SECONDS",
+        default_val=86400,
+    )
+
+    # Number of course IDs stored in every cache value of the course index, which must not exceed
+    # the cache backend's maximum value size (memcached allows 1 MB by default).
+    settings.PERIODIC_INSTRUCTOR_REPORTS_CATALOG_SHARD_SIZE = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_CATALOG_SHARD_SIZE",
+        default_val=5000,
+    )
+
+    # Tracer recording the spans of the periodic report runs, like
+    # "periodic_instructor_reports.tracing.OpenTelemetryTracer". Leave empty to disable tracing.
+    settings.PERIODIC_INSTRUCTOR_REPORTS_TRACER = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_TRACER",
+        default_val="",
+    )
+
+    # Provider returning the version of the courses' data and the store of the report files used
+    # to reuse unchanged reports, the report store setting the files are stored by, and the
+    # seconds and number of cached reports after the least recently used ones are evicted.
+    settings.PERIODIC_INSTRUCTOR_REPORTS_COURSE_VERSION_PROVIDER = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_COURSE_VERSION_PROVIDER",
+        default_val="periodic_instructor_reports.artifacts.CourseDataVersionProvider",
+    )
+    settings.PERIODIC_INSTRUCTOR_REPORTS_REPORT_ARTIFACT_STORE = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_REPORT_ARTIFACT_STORE",
+        default_val="periodic_instructor_reports.artifacts.ReportStoreArtifactStore",
+    )
+    settings.PERIODIC_INSTRUCTOR_REPORTS_REPORT_STORE_CONFIG = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_REPORT_STORE_CONFIG",
+        default_val="GRADES_DOWNLOAD",
+    )
+    settings.PERIODIC_INSTRUCTOR_REPORTS_ARTIFACT_CACHE_MAX_AGE = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_ARTIFACT_CACHE_MAX_AGE",
+        default_val=2592000,
+    )
+    settings.PERIODIC_INSTRUCTOR_REPORTS_ARTIFACT_CACHE_MAX_ENTRIES = get_setting(
+        settings,
+        "PERIODIC_INSTRUCTOR_REPORTS_ARTIFACT_CACHE_MAX_ENTRIES",
+        default_val=10000,
+    )
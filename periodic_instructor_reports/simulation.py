@@ -0,0 +1,226 @@
+"""
+Capacity planning simulation of the periodic report schedules.
+
+The simulation replays the schedules in virtual time: every schedule is triggered
+at its interval, and every run produces the Celery tasks the periodic task wrapper
+would execute. A run calls the report task for every course by itself, fans the
+calls out to balanced batches, or runs every call as a separate task if fair
+sharing is enabled. The tasks are executed by a fixed number of workers in the
+order they arrived, which gives the time every task waited for a free worker.
+
+Like the periodic task wrapper, a run of a schedule with the `skip` overlap policy
+is skipped if the schedule's previous run is still in progress when it is
+triggered, and a fair-share call is skipped while the previous call of the same
+schedule for the course is still waiting or running. Fair-share calls wait for one
+of the `PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_CONCURRENCY` slots as well as for a
+free worker. The `queue` and `coalesce` overlap policies are both simulated by
+executing every run, so coalesced runs are overestimated.
+"""
+
+import heapq
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from periodic_instructor_reports.costs import bin_pack
+
+
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 24 * SECONDS_PER_HOUR
+
+
+class ScheduleSpec(NamedTuple):
+    """
+    Simulated schedule: its interval, first trigger time and the durations of the tasks of a run.
+    """
+
+    schedule_id: int
+    interval: float
+    offset: float
+    task_durations: List[float]
+    skip_overlapping: bool = False
+    fair_share: bool = False
+
+
+class Job(NamedTuple):
+    """
+    Simulated task: the time it was triggered and its duration, both in seconds.
+
+    `call` is the index of the task within the run, which identifies the course of a fair-share call.
+    """
+
+    schedule_id: int
+    arrival: float
+    duration: float
+    call: int = 0
+    skip_overlapping: bool = False
+    fair_share: bool = False
+
+
+class SimulationResult(NamedTuple):
+    """
+    Outcome of executing the simulated tasks by a fixed number of workers.
+    """
+
+    workers: int
+    max_wait: float
+    mean_wait: float
+    busy_seconds_by_hour: List[float]
+    skipped_jobs: int = 0
+
+
+def get_task_durations(
+    call_durations: Dict[str, float],
+    fan_out_slots: int = 0,
+    fair_share: bool = False,
+) -> List[float]:
+    """
+    Return the durations of the tasks executing a run with the given report call durations.
+    """
+
+    if not call_durations:
+        return []
+
+    if fair_share:
+        return list(call_durations.values())
+
+    if fan_out_slots:
+        batches = bin_pack(list(call_durations), call_durations, fan_out_slots)
+        return [sum(call_durations[course_id] for course_id in batch) for batch in batches]
+
+    return [sum(call_durations.values())]
+
+
+def get_jobs(schedule_specs: List[ScheduleSpec], days: int) -> List[Job]:
+    """
+    Return the tasks triggered within the simulated days, ordered by their arrival.
+    """
+
+    horizon = days * SECONDS_PER_DAY
+    jobs = []
+
+    for spec in schedule_specs:
+        arrival = spec.offset % spec.interval
+
+        while arrival < horizon:
+            jobs.extend(
+                Job(spec.schedule_id, arrival, duration, call, spec.skip_overlapping, spec.fair_share)
+                for call, duration in enumerate(spec.task_durations)
+            )
+            arrival += spec.interval
+
+    return sorted(jobs, key=lambda job: job.arrival)
+
+
+def get_peak_concurrency(jobs: List[Job]) -> int:
+    """
+    Return the highest number of tasks running at once if every task started on arrival.
+    """
+
+    # Ends sort before starts at the same time, so back-to-back tasks do not overlap
+    events = sorted(
+        [(job.arrival, 1) for job in jobs] + [(job.arrival + job.duration, -1) for job in jobs]
+    )
+
+    peak = running = 0
+    for _, change in events:
+        running += change
+        peak = max(peak, running)
+
+    return peak
+
+
+def add_busy_time(busy_seconds_by_hour: List[float], start: float, end: float) -> None:
+    """
+    Add the time between start and end to the busy time of the hours of the day it overlaps.
+    """
+
+    while start < end:
+        hour = int(start % SECONDS_PER_DAY // SECONDS_PER_HOUR)
+        hour_end = (start // SECONDS_PER_HOUR + 1) * SECONDS_PER_HOUR
+        busy_seconds_by_hour[hour] += min(end, hour_end) - start
+        start = hour_end
+
+
+def simulate(jobs: List[Job], workers: int, fair_share_concurrency: Optional[int] = None) -> SimulationResult:
+    """
+    Execute the tasks by the given number of workers, in the order of their arrival.
+
+    Fair-share tasks wait for one of the `fair_share_concurrency` slots as well, if given.
+    """
+
+    free_at = [0.0] * workers
+    slot_free_at = [0.0] * (fair_share_concurrency or workers)
+    busy_seconds_by_hour = [0.0] * 24
+    waits = []
+
+    # End of the last executed run of every schedule and of the last call of every fair-share course
+    run_ends: Dict[int, float] = {}
+    call_ends: Dict[Tuple[int, int], float] = {}
+    started_runs: Set[Tuple[int, float]] = set()
+    skipped_runs: Set[Tuple[int, float]] = set()
+    skipped_jobs = 0
+
+    for job in jobs:
+        run = (job.schedule_id, job.arrival)
+
+        if job.fair_share:
+            skipped = call_ends.get((job.schedule_id, job.call), 0.0) > job.arrival
+        elif run not in started_runs and run not in skipped_runs:
+            if job.skip_overlapping and run_ends.get(job.schedule_id, 0.0) > job.arrival:
+                skipped_runs.add(run)
+            else:
+                started_runs.add(run)
+            skipped = run in skipped_runs
+        else:
+            skipped = run in skipped_runs
+
+        if skipped:
+            skipped_jobs += 1
+            continue
+
+        start = max(job.arrival, heapq.heappop(free_at))
+
+        if job.fair_share:
+            start = max(start, heapq.heappop(slot_free_at))
+            heapq.heappush(slot_free_at, start + job.duration)
+            call_ends[(job.schedule_id, job.call)] = start + job.duration
+
+        heapq.heappush(free_at, start + job.duration)
+        run_ends[job.schedule_id] = max(run_ends.get(job.schedule_id, 0.0), start + job.duration)
+        add_busy_time(busy_seconds_by_hour, start, start + job.duration)
+        waits.append(start - job.arrival)
+
+    return SimulationResult(
+        workers=workers,
+        max_wait=max(waits, default=0.0),
+        mean_wait=sum(waits) / len(waits) if waits else 0.0,
+        busy_seconds_by_hour=busy_seconds_by_hour,
+        skipped_jobs=skipped_jobs,
+    )
+
+
+def get_required_workers(
+    jobs: List[Job],
+    latency_target: float,
+    fair_share_concurrency: Optional[int] = None,
+) -> int:
+    """
+    Return the lowest number of workers keeping every task's wait within the latency target.
+
+    If fair-share tasks wait for a slot longer than the target regardless of the number of
+    workers, the number of workers running every task on arrival is returned.
+    """
+
+    if not jobs:
+        return 0
+
+    low, high = 1, max(get_peak_concurrency(jobs), 1)
+
+    while low < high:
+        middle = (low + high) // 2
+
+        if simulate(jobs, middle, fair_share_concurrency).max_wait <= latency_target:
+            high = middle
+        else:
+            low = middle + 1
+
+    return low
@@ -12,19 +12,68 @@ wrapper, we need to fake an HTTP request manually. To determine the user for
 """
 
 import hashlib
+import time
+from contextlib import nullcontext
 from datetime import date
 from importlib import import_module
-from typing import Tuple, Callable
+from typing import List, Optional, Tuple, Callable
 
 from celery import shared_task
 from celery.utils.log import get_task_logger
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.http.request import HttpRequest
+from django.utils import timezone
 from opaque_keys.edx.locations import SlashSeparatedCourseKey
 
+from periodic_instructor_reports import metrics, tracing
+from periodic_instructor_reports.artifacts import (
+    evict_artifacts,
+    get_artifact_key,
+    record_artifact,
+    reuse_artifact,
+)
+from periodic_instructor_reports.backpressure import (
+    DECISION_DEFER,
+    DECISION_SHED,
+    check_backpressure,
+)
+from periodic_instructor_reports.catalog import resolve_selectors
+from periodic_instructor_reports.catchup import (
+    CLAIM_CATCH_UP,
+    CLAIM_DUPLICATE,
+    CLAIM_MISSED,
+    claim_run,
+    get_catch_up_countdown,
+)
 from periodic_instructor_reports.compat import get_ccx_model
-from periodic_instructor_reports.models import PeriodicReportSchedule
+from periodic_instructor_reports.deadlines import (
+    CourseTimeBudgetExceeded,
+    carry_over,
+    clear_carried_over,
+    get_call_budget,
+    get_deadline,
+    is_past_deadline,
+    order_carried_over_first,
+    record_timeout,
+    time_budget,
+)
+from periodic_instructor_reports.costs import (
+    bin_pack,
+    get_duration_estimates,
+    order_longest_first,
+    record_duration,
+    record_pending_task,
+)
+from periodic_instructor_reports.fairshare import (
+    enqueue_report_calls,
+    get_group_by,
+    keep_report_call_alive,
+    start_report_calls,
+)
+from periodic_instructor_reports.locks import ScheduleLock
+from periodic_instructor_reports.models import PendingReportCall, PeriodicReportSchedule, ReportTimeout
 
 
 logger = get_task_logger(__name__)
@@ -58,27 +107,23 @@ def create_fake_request(user: User) -> HttpRequest:
     return request
 
 
-@shared_task
-def periodic_task_wrapper(periodic_task_schedule_id: int) -> None:
+def get_target_course_ids(schedule: PeriodicReportSchedule) -> list:
     """
-    Wrapper for executing instructor or other capable tasks in a periodic way.
+    Return the course keys the schedule's report task should be called for.
 
-    The target task's path is dynamically imported and executed with the pre-defined arguments and
-    keyword arguments.
+    The listed course IDs are followed by the IDs of the courses matching the schedule's selectors.
     """
 
-    logger.debug(f"Received task for schedule {periodic_task_schedule_id}")
-
-    # pylint: disable=no-member
-    schedule: PeriodicReportSchedule = PeriodicReportSchedule.objects.get(
-        id=periodic_task_schedule_id
-    )
-
-    report_task = get_function_from_path(schedule.task.path)
-
     target_course_ids = []
+    course_ids = list(schedule.course_ids)
+    listed_course_ids = set(course_ids)
+    course_ids.extend(
+        course_id
+        for course_id in resolve_selectors(schedule.course_selectors)
+        if course_id not in listed_course_ids
+    )
 
-    for course_id in schedule.course_ids:
+    for course_id in course_ids:
         try:
             target_course_ids.append(SlashSeparatedCourseKey.from_string(course_id))
         except Exception as exc:
@@ -86,7 +131,7 @@ def periodic_task_wrapper(periodic_task_schedule_id: int) -> None:
 
     if schedule.include_ccx:
         ccx_model = get_ccx_model()
-        custom_courses = ccx_model.objects.filter(course_id__in=schedule.course_ids)
+        custom_courses = ccx_model.objects.filter(course_id__in=course_ids)
         ccx_course_ids = list({ccx.locator for ccx in custom_courses})
 
         if schedule.only_ccx:
@@ -94,33 +139,394 @@ def periodic_task_wrapper(periodic_task_schedule_id: int) -> None:
         else:
             target_course_ids.extend(ccx_course_ids)
 
-    logger.info(f"Calling {report_task} for {target_course_ids}")
-
-    for course_id in target_course_ids:
-        task_call_args = [course_id, *schedule.arguments]
-        task_call_kwargs = {**schedule.keyword_arguments}
-
-        if schedule.task.requires_request:
-            task_call_args.insert(0, create_fake_request(schedule.owner))
-
-        if schedule.upload_folder_structure == PeriodicReportSchedule.STRUCTURE_FLAT:
-            task_call_kwargs.update({
-                "upload_parent_dir": schedule.upload_folder_prefix,
-            })
-        elif schedule.upload_folder_structure == PeriodicReportSchedule.STRUCTURE_REGULAR:
-            hashed_course_id = hashlib.sha1(str(course_id).encode('utf-8')).hexdigest()
-            task_call_kwargs.update({
-                "upload_parent_dir": "{directory_prefix}{directory_name}".format(
-                    directory_prefix=schedule.upload_folder_prefix,
-                    directory_name=hashed_course_id,
-                )
-            })
-        elif schedule.upload_folder_structure == PeriodicReportSchedule.STRUCTURE_BY_DATE:
-            task_call_kwargs.update({
-                "upload_parent_dir": "{directory_prefix}{directory_name}".format(
-                    directory_prefix=schedule.upload_folder_prefix,
-                    directory_name=date.today().strftime("%Y/%m/%d"),
+    return target_course_ids
+
+
+def get_task_call(schedule: PeriodicReportSchedule, course_id: object) -> Tuple[list, dict]:
+    """
+    Return the arguments and keyword arguments of the report task call for the course.
+    """
+
+    task_call_args = [course_id, *schedule.arguments]
+    task_call_kwargs = {**schedule.keyword_arguments}
+
+    if schedule.task.requires_request:
+        task_call_args.insert(0, create_fake_request(schedule.owner))
+
+    if schedule.upload_folder_structure == PeriodicReportSchedule.STRUCTURE_FLAT:
+        task_call_kwargs.update({
+            "upload_parent_dir": schedule.upload_folder_prefix,
+        })
+    elif schedule.upload_folder_structure == PeriodicReportSchedule.STRUCTURE_REGULAR:
+        hashed_course_id = hashlib.sha1(str(course_id).encode('utf-8')).hexdigest()
+        task_call_kwargs.update({
+            "upload_parent_dir": "{directory_prefix}{directory_name}".format(
+                directory_prefix=schedule.upload_folder_prefix,
+                directory_name=hashed_course_id,
+            )
+        })
+    elif schedule.upload_folder_structure == PeriodicReportSchedule.STRUCTURE_BY_DATE:
+        task_call_kwargs.update({
+            "upload_parent_dir": "{directory_prefix}{directory_name}".format(
+                directory_prefix=schedule.upload_folder_prefix,
+                directory_name=date.today().strftime("%Y/%m/%d"),
+            )
+        })
+
+    return task_call_args, task_call_kwargs
+
+
+def call_report_task(
+    schedule: PeriodicReportSchedule,
+    report_task: Callable,
+    course_id: object,
+    deadline: Optional[float] = None,
+) -> None:
+    """
+    Call the report task for the course and update the course's duration estimate.
+
+    If the report task caches its artifacts and the course's data did not change since the
+    last call, the last report is reused instead. The call is interrupted if it exceeds the
+    schedule's course time budget or the run's deadline.
+    """
+
+    task_call_args, task_call_kwargs = get_task_call(schedule, course_id)
+    upload_parent_dir = task_call_kwargs.get("upload_parent_dir", "")
+    artifact_key = get_artifact_key(schedule, course_id) if schedule.task.cache_artifacts else None
+
+    if artifact_key and reuse_artifact(artifact_key, upload_parent_dir):
+        logger.info(f"Reused the report of {course_id} generated at version {artifact_key.version}")
+        return
+
+    timed_out = False
+    result = None
+
+    with tracing.span("report.call", schedule=schedule.id, course=str(course_id)):
+        generated_at = timezone.now()
+        started_at = time.monotonic()
+
+        try:
+            with time_budget(get_call_budget(schedule, deadline)):
+                result = report_task(*task_call_args, **task_call_kwargs)
+        except CourseTimeBudgetExceeded:
+            timed_out = True
+
+        duration = time.monotonic() - started_at
+
+    if timed_out:
+        logger.warning(f"Interrupted {report_task} for {course_id} after {duration:.1f} seconds")
+        record_timeout(schedule, course_id, duration, ReportTimeout.KIND_BUDGET)
+    elif artifact_key:
+        record_artifact(artifact_key, upload_parent_dir, generated_at)
+
+    # The edX platform's report functions return the instructor task generating the report
+    instructor_task_id = getattr(result, "task_id", None)
+
+    if isinstance(instructor_task_id, str):
+        record_pending_task(schedule.task.path, str(course_id), instructor_task_id)
+    else:
+        # The duration of an interrupted call can only raise the estimate
+        record_duration(schedule.task.path, str(course_id), duration, lower_bound=timed_out)
+    metrics.observe("report.duration", duration, schedule=schedule.id, course=str(course_id))
+
+
+def release_lock(schedule: PeriodicReportSchedule, lock: ScheduleLock) -> None:
+    """
+    Release the schedule's lock and dispatch the run queued or coalesced behind the finished run, if any.
+    """
+
+    if lock.release():
+        logger.info(f"Dispatching the run queued behind the finished run of schedule {schedule.id}")
+        periodic_task_wrapper.apply_async(args=[schedule.id], kwargs={"claimed": True})
+
+
+def handle_overlapping_run(schedule: PeriodicReportSchedule, lock: ScheduleLock) -> None:
+    """
+    Apply the schedule's overlap policy to a run triggered while another run holds the lock.
+
+    Queued and coalesced runs are flagged on the lock, and the run holding it dispatches a
+    single run once it released the lock, so at most one run of a schedule waits.
+    """
+
+    holder = lock.get_holder()
+    lag = (timezone.now() - holder.acquired_at).total_seconds() if holder else 0.0
+    waiting_policies = [PeriodicReportSchedule.OVERLAP_QUEUE, PeriodicReportSchedule.OVERLAP_COALESCE]
+
+    if schedule.overlap_policy == PeriodicReportSchedule.OVERLAP_QUEUE and lock.request_rerun():
+        logger.info(f"Queueing run of schedule {schedule.id} behind the run in progress for {lag:.1f} seconds")
+    elif schedule.overlap_policy == PeriodicReportSchedule.OVERLAP_COALESCE and lock.request_rerun():
+        logger.info(
+            f"Coalescing run of schedule {schedule.id} into the run in progress for {lag:.1f} seconds"
+        )
+    elif schedule.overlap_policy in waiting_policies:
+        logger.info(f"Run of schedule {schedule.id} finished meanwhile, dispatching the new run")
+        periodic_task_wrapper.apply_async(args=[schedule.id], kwargs={"claimed": True})
+    else:
+        logger.info(
+            f"Skipping run of schedule {schedule.id} overlapping the run in progress for {lag:.1f} seconds"
+        )
+
+    metrics.observe("lock.overlap_lag", lag, schedule=schedule.id, policy=schedule.overlap_policy)
+
+
+def hand_off_courses(schedule: PeriodicReportSchedule, course_ids: list, deadline: float) -> None:
+    """
+    Hand off the courses not called before the run's deadline to the next run.
+    """
+
+    elapsed = time.time() - deadline + schedule.run_deadline
+    logger.warning(
+        f"Run of schedule {schedule.id} passed its deadline after {elapsed:.1f} seconds, "
+        f"handing off {len(course_ids)} courses to the next run"
+    )
+    carry_over(schedule, course_ids, elapsed)
+
+
+@shared_task
+@tracing.traced("periodic_task_wrapper")
+def periodic_task_wrapper(
+    periodic_task_schedule_id: int,
+    deferrals: int = 0,
+    claimed: bool = False,
+) -> None:
+    """
+    Wrapper for executing instructor or other capable tasks in a periodic way.
+
+    The target task's path is dynamically imported and executed with the pre-defined arguments and
+    keyword arguments. Before executing the target task, the depth of its queue is checked and the
+    execution is deferred or skipped if the queue is backlogged. Only one run of a schedule is
+    executed at a time; overlapping runs are handled according to the schedule's overlap policy.
+
+    Runs triggered by beat claim the schedule first, so overdue runs flushed after a downtime
+    collapse into one. Runs dispatched by the wrapper itself are already `claimed`.
+
+    The courses are called in the order of their estimated call duration, the longest first. If
+    the schedule fans out the calls, the courses are split into batches of balanced estimated
+    duration and every batch is executed by a separate `run_report_task_batch` task. If fair
+    sharing is enabled, the calls are enqueued and started by `dispatch_report_calls` instead.
+    Courses not called before the schedule's run deadline are called first by the next run.
+    Reports of courses whose data did not change since the last call are reused if the report
+    task caches its artifacts.
+    """
+
+    logger.debug(f"Received task for schedule {periodic_task_schedule_id}")
+
+    with tracing.span("schedule.load", schedule=periodic_task_schedule_id):
+        # pylint: disable=no-member
+        schedule: PeriodicReportSchedule = PeriodicReportSchedule.objects.get(
+            id=periodic_task_schedule_id
+        )
+
+    if not claimed:
+        claim = claim_run(schedule)
+
+        if claim == CLAIM_DUPLICATE:
+            logger.info(f"Skipping duplicate run of schedule {schedule.id}")
+            metrics.increment("catch_up.coalesced", schedule=schedule.id)
+            return
+
+        if claim == CLAIM_MISSED:
+            logger.info(f"Skipping missed run of schedule {schedule.id} due to its catch-up policy")
+            metrics.increment("catch_up.skipped", schedule=schedule.id)
+            return
+
+        if claim == CLAIM_CATCH_UP:
+            countdown = get_catch_up_countdown(schedule)
+            logger.info(f"Dispatching catch-up run of schedule {schedule.id} in {countdown} seconds")
+            metrics.increment("catch_up.dispatched", schedule=schedule.id)
+            periodic_task_wrapper.apply_async(
+                args=[schedule.id],
+                kwargs={"claimed": True},
+                countdown=countdown,
+            )
+            return
+
+    decision = check_backpressure(schedule.task, deferrals=deferrals)
+
+    if decision == DECISION_DEFER:
+        countdown = int(getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_BACKPRESSURE_DEFER_SECONDS", 300))
+        logger.info(f"Deferring schedule {schedule.id} by {countdown} seconds due to queue backlog")
+        metrics.increment("backpressure.deferred", schedule=schedule.id, deferrals=deferrals + 1)
+        periodic_task_wrapper.apply_async(
+            args=[schedule.id],
+            kwargs={"deferrals": deferrals + 1, "claimed": True},
+            countdown=countdown,
+        )
+        return
+
+    if decision == DECISION_SHED:
+        logger.warning(f"Skipping schedule {schedule.id} due to queue backlog")
+        metrics.increment("backpressure.shed", schedule=schedule.id, deferrals=deferrals)
+        return
+
+    lock = ScheduleLock(schedule.id)
+
+    if not lock.acquire():
+        handle_overlapping_run(schedule, lock)
+        return
+
+    logger.info(f"Acquired lock of schedule {schedule.id}")
+    lock_handed_off = False
+
+    try:
+        if schedule.task.cache_artifacts:
+            evict_artifacts()
+
+        report_task = get_function_from_path(schedule.task.path)
+
+        with tracing.span("courses.expand", schedule=schedule.id):
+            target_course_ids = get_target_course_ids(schedule)
+
+        estimates = get_duration_estimates(schedule.task.path, map(str, target_course_ids))
+        deadline = get_deadline(schedule)
+        carried_over_course_ids = schedule.carried_over_course_ids
+        clear_carried_over(schedule)
+
+        if get_group_by():
+            logger.info(f"Enqueueing {report_task} for {target_course_ids}")
+            enqueue_report_calls(schedule, order_carried_over_first(
+                order_longest_first(target_course_ids, estimates),
+                carried_over_course_ids,
+            ))
+            dispatch_report_calls.delay()
+            return
+
+        if schedule.fan_out_slots:
+            batches = bin_pack(target_course_ids, estimates, schedule.fan_out_slots)
+
+            # The lock is held until the last batch finished, which releases it
+            lock_handed_off = bool(batches) and lock.start_batches(len(batches))
+
+            for batch in batches:
+                batch = order_carried_over_first(batch, carried_over_course_ids)
+                logger.info(f"Dispatching {report_task} for {batch}")
+                run_report_task_batch.delay(
+                    schedule.id,
+                    [str(course_id) for course_id in batch],
+                    deadline=deadline,
+                    lock_token=lock.token if lock_handed_off else None,
                 )
-            })
 
-        report_task(*task_call_args, **task_call_kwargs)
+            return
+
+        target_course_ids = order_carried_over_first(
+            order_longest_first(target_course_ids, estimates),
+            carried_over_course_ids,
+        )
+
+        logger.info(f"Calling {report_task} for {target_course_ids}")
+
+        for index, course_id in enumerate(target_course_ids):
+            if is_past_deadline(deadline):
+                hand_off_courses(schedule, target_course_ids[index:], deadline)
+                return
+
+            with lock.keep_alive():
+                call_report_task(schedule, report_task, course_id, deadline)
+
+            if not lock.heartbeat():
+                logger.error(f"Lost lock of schedule {schedule.id}, stopping the run")
+                return
+    finally:
+        if not lock_handed_off:
+            release_lock(schedule, lock)
+
+
+@shared_task
+@tracing.traced("run_report_task_batch")
+def run_report_task_batch(
+    periodic_task_schedule_id: int,
+    course_ids: List[str],
+    deadline: Optional[float] = None,
+    lock_token: Optional[str] = None,
+) -> None:
+    """
+    Call the schedule's report task for a batch of courses fanned out by the periodic task wrapper.
+
+    The `deadline` of the run is a POSIX timestamp. The batch renews the schedule's lock held
+    using `lock_token` while it is running, and the last batch finishing releases the lock.
+    """
+
+    # pylint: disable=no-member
+    schedule: PeriodicReportSchedule = PeriodicReportSchedule.objects.get(
+        id=periodic_task_schedule_id
+    )
+
+    lock = ScheduleLock(schedule.id, token=lock_token) if lock_token else None
+
+    try:
+        report_task = get_function_from_path(schedule.task.path)
+
+        logger.info(f"Calling {report_task} for {course_ids}")
+
+        for index, course_id in enumerate(course_ids):
+            if is_past_deadline(deadline):
+                hand_off_courses(schedule, course_ids[index:], deadline)
+                return
+
+            with lock.keep_alive() if lock else nullcontext():
+                call_report_task(schedule, report_task, SlashSeparatedCourseKey.from_string(course_id), deadline)
+    finally:
+        if lock and lock.finish_batch() == 0:
+            release_lock(schedule, lock)
+
+
+@shared_task
+def run_schedules_now(periodic_task_schedule_ids: List[int]) -> None:
+    """
+    Dispatch a claimed run of every schedule, used by the admin's run now action.
+    """
+
+    for schedule_id in periodic_task_schedule_ids:
+        periodic_task_wrapper.apply_async(args=[schedule_id], kwargs={"claimed": True})
+
+
+@shared_task
+@tracing.traced("dispatch_report_calls")
+def dispatch_report_calls() -> None:
+    """
+    Start the pending report task calls fitting into the free capacity, by their fair share.
+    """
+
+    for pending_call in start_report_calls():
+        run_report_call.delay(pending_call.id)
+
+
+@shared_task
+def run_report_call(pending_report_call_id: int) -> None:
+    """
+    Call the report task for a pending call started by `dispatch_report_calls`.
+
+    The call is traced as part of the run which enqueued it, not of the dispatcher starting it.
+    """
+
+    # pylint: disable=no-member
+    pending_call = PendingReportCall.objects.select_related("schedule").filter(id=pending_report_call_id).first()
+
+    if pending_call is None:
+        logger.warning(f"Pending report call {pending_report_call_id} was dropped before it ran")
+        dispatch_report_calls.delay()
+        return
+
+    schedule = pending_call.schedule
+    parent = tracing.SpanContext.from_traceparent(pending_call.traceparent)
+
+    # The run's deadline counts from the time the run enqueued the call
+    deadline = get_deadline(schedule, pending_call.enqueued_at.timestamp())
+
+    try:
+        with tracing.span("run_report_call", parent=parent):
+            report_task = get_function_from_path(schedule.task.path)
+            course_id = SlashSeparatedCourseKey.from_string(pending_call.course_id)
+
+            if is_past_deadline(deadline):
+                hand_off_courses(schedule, [course_id], deadline)
+                return
+
+            logger.info(f"Calling {report_task} for {course_id}")
+
+            with keep_report_call_alive(pending_call.id):
+                call_report_task(schedule, report_task, course_id, deadline)
+    finally:
+        pending_call.delete()
+        dispatch_report_calls.delay()
@@ -0,0 +1,316 @@
+"""
+Optional distributed tracing of periodic report runs.
+
+A periodic report run crosses several processes: Celery beat sends the periodic
+task wrapper, the wrapper calls the report task, which submits an instructor task
+executed by another worker. To follow a run end to end, the wrapper records spans
+for loading the schedule, expanding the courses and every report task call, and
+the trace context is passed to every task sent meanwhile using the W3C
+`traceparent` Celery message header.
+
+Tracing is disabled unless `PERIODIC_INSTRUCTOR_REPORTS_TRACER` is set. The
+OpenTelemetry tracer requires the `opentelemetry-api` package and exports the spans
+using the tracer provider configured for the process. The in-memory tracer keeps
+the finished spans in memory and it is used by the tests.
+"""
+
+import secrets
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from celery.signals import before_task_publish, task_postrun, task_prerun
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+TRACEPARENT_HEADER = "traceparent"
+TRACED_TASK_PREFIX = "periodic_instructor_reports."
+
+
+class SpanContext(NamedTuple):
+    """
+    Identifiers of a span, used as the parent of the spans started within it.
+    """
+
+    trace_id: str
+    span_id: str
+
+    def to_traceparent(self) -> str:
+        """
+        Return the W3C `traceparent` header value of the span context.
+        """
+
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    @classmethod
+    def from_traceparent(cls, traceparent: str) -> Optional["SpanContext"]:
+        """
+        Parse a W3C `traceparent` header value, return `None` if it is invalid.
+        """
+
+        parts = traceparent.split("-")
+
+        if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+
+        return cls(parts[1], parts[2])
+
+
+class Span:
+    """
+    Base class of the spans started by tracers.
+    """
+
+    context: SpanContext
+
+    def set_attribute(self, key: str, value: object) -> None:
+        """
+        Set an attribute of the span.
+        """
+
+        raise NotImplementedError
+
+    def record_exception(self, exc: BaseException) -> None:
+        """
+        Mark the span as failed by the exception.
+        """
+
+        raise NotImplementedError
+
+    def end(self) -> None:
+        """
+        Finish the span.
+        """
+
+        raise NotImplementedError
+
+
+class Tracer:
+    """
+    Base class of tracers.
+    """
+
+    def start_span(self, name: str, parent: Optional[SpanContext], attributes: dict) -> Span:
+        """
+        Start a new span as a child of the parent or as the root of a new trace.
+        """
+
+        raise NotImplementedError
+
+
+class InMemorySpan(Span):
+    """
+    Span kept in memory by the in-memory tracer.
+    """
+
+    def __init__(self, name: str, parent: Optional[SpanContext], attributes: dict):
+        self.name = name
+        self.parent = parent
+        self.attributes = dict(attributes)
+        self.context = SpanContext(
+            parent.trace_id if parent else secrets.token_hex(16),
+            secrets.token_hex(8),
+        )
+        self.exception: Optional[BaseException] = None
+        self.start_time = time.monotonic()
+        self.end_time: Optional[float] = None
+
+    def set_attribute(self, key: str, value: object) -> None:
+        self.attributes[key] = value
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.exception = exc
+
+    def end(self) -> None:
+        self.end_time = time.monotonic()
+        InMemoryTracer.finished_spans.append(self)
+
+
+class InMemoryTracer(Tracer):
+    """
+    Tracer keeping the finished spans in memory. Used by the tests.
+    """
+
+    finished_spans: List[InMemorySpan] = []
+
+    def start_span(self, name: str, parent: Optional[SpanContext], attributes: dict) -> Span:
+        return InMemorySpan(name, parent, attributes)
+
+
+class OpenTelemetrySpan(Span):
+    """
+    Span recorded by the OpenTelemetry API.
+    """
+
+    def __init__(self, otel_span: object):
+        self.otel_span = otel_span
+        otel_span_context = otel_span.get_span_context()
+        self.context = SpanContext(
+            format(otel_span_context.trace_id, "032x"),
+            format(otel_span_context.span_id, "016x"),
+        )
+
+    def set_attribute(self, key: str, value: object) -> None:
+        self.otel_span.set_attribute(key, value)
+
+    def record_exception(self, exc: BaseException) -> None:
+        # pylint: disable=import-error,import-outside-toplevel
+        from opentelemetry.trace import Status, StatusCode
+
+        self.otel_span.record_exception(exc)
+        self.otel_span.set_status(Status(StatusCode.ERROR, str(exc)))
+
+    def end(self) -> None:
+        self.otel_span.end()
+
+
+class OpenTelemetryTracer(Tracer):
+    """
+    Tracer recording the spans using the OpenTelemetry API.
+    """
+
+    def start_span(self, name: str, parent: Optional[SpanContext], attributes: dict) -> Span:
+        # pylint: disable=import-error,import-outside-toplevel
+        from opentelemetry import trace
+
+        context = None
+
+        if parent:
+            context = trace.set_span_in_context(trace.NonRecordingSpan(trace.SpanContext(
+                trace_id=int(parent.trace_id, 16),
+                span_id=int(parent.span_id, 16),
+                is_remote=True,
+                trace_flags=trace.TraceFlags(trace.TraceFlags.SAMPLED),
+            )))
+
+        tracer = trace.get_tracer(__name__)
+        return OpenTelemetrySpan(tracer.start_span(name, context=context, attributes=attributes))
+
+
+_current_context: ContextVar[Optional[SpanContext]] = ContextVar("current_span_context", default=None)
+_task_context_tokens: Dict[str, object] = {}
+_tracers: Dict[str, Tracer] = {}
+
+
+def get_tracer() -> Optional[Tracer]:
+    """
+    Return the configured tracer instance or `None` if tracing is disabled.
+    """
+
+    tracer_path = getattr(settings, "PERIODIC_INSTRUCTOR_REPORTS_TRACER", "")
+
+    if not tracer_path:
+        return None
+
+    if tracer_path not in _tracers:
+        _tracers[tracer_path] = import_string(tracer_path)()
+
+    return _tracers[tracer_path]
+
+
+def get_current_context() -> Optional[SpanContext]:
+    """
+    Return the context of the span in progress, or the remote parent of the task in progress.
+    """
+
+    return _current_context.get()
+
+
+@contextmanager
+def span(name: str, parent: Optional[SpanContext] = None, **attributes) -> Iterator[Optional[Span]]:
+    """
+    Record the code executed within the context manager as a span.
+
+    The span is the child of the given parent, or of the span in progress. If
+    tracing is disabled, nothing is recorded and `None` is yielded.
+    """
+
+    tracer = get_tracer()
+
+    if tracer is None:
+        yield None
+        return
+
+    current_span = tracer.start_span(name, parent or get_current_context(), attributes)
+    token = _current_context.set(current_span.context)
+
+    try:
+        yield current_span
+    except BaseException as exc:
+        current_span.record_exception(exc)
+        raise
+    finally:
+        _current_context.reset(token)
+        current_span.end()
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorator recording every call of the decorated function as a span.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# pylint: disable=unused-argument
+@before_task_publish.connect
+def inject_trace_context(sender: str = None, headers: dict = None, **kwargs) -> None:
+    """
+    Pass the trace context to the published task using the message headers.
+
+    Tasks of this app published outside of a span, like the periodic task wrapper
+    sent by Celery beat, start a new trace.
+    """
+
+    if get_tracer() is None or headers is None:
+        return
+
+    context = get_current_context()
+
+    if context is None and sender and sender.startswith(TRACED_TASK_PREFIX):
+        with span("publish", task=sender):
+            headers[TRACEPARENT_HEADER] = get_current_context().to_traceparent()
+    elif context is not None:
+        headers[TRACEPARENT_HEADER] = context.to_traceparent()
+
+
+# pylint: disable=unused-argument
+@task_prerun.connect
+def extract_trace_context(task_id: str = None, task: object = None, **kwargs) -> None:
+    """
+    Make the trace context received in the message headers the parent of the task's spans.
+    """
+
+    if get_tracer() is None or task is None:
+        return
+
+    traceparent = getattr(task.request, TRACEPARENT_HEADER, None)
+    traceparent = traceparent or (getattr(task.request, "headers", None) or {}).get(TRACEPARENT_HEADER)
+    context = SpanContext.from_traceparent(traceparent) if traceparent else None
+
+    if context is not None:
+        _task_context_tokens[task_id] = _current_context.set(context)
+
+
+# pylint: disable=unused-argument
+@task_postrun.connect
+def reset_trace_context(task_id: str = None, **kwargs) -> None:
+    """
+    Forget the trace context of the finished task.
+    """
+
+    token = _task_context_tokens.pop(task_id, None)
+
+    if token is not None:
+        _current_context.reset(token)
@@ -74,6 +74,8 @@ setup(
     url="https://gitlab.com/opencraft/client/esme-learning/periodic-instructor-reports",
     packages=[
         "periodic_instructor_reports",
+        "periodic_instructor_reports.management",
+        "periodic_instructor_reports.management.commands",
         "periodic_instructor_reports.migrations",
     ],
     include_package_data=True,
@@ -19,11 +19,42 @@ DATABASES = {
 }
 
 INSTALLED_APPS = [
+    "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
+    "django.contrib.messages",
+    "django.contrib.sessions",
     "django_celery_beat",
     "periodic_instructor_reports",
 ]
 
+MIDDLEWARE = [
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+]
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+                "django.template.context_processors.request",
+            ],
+        },
+    },
+]
+
 SECRET_KEY = "insecure-secret-key"
 CELERYBEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
+
+PERIODIC_INSTRUCTOR_REPORTS_METRICS_BACKEND = "periodic_instructor_reports.metrics.InMemoryMetricsBackend"
+PERIODIC_INSTRUCTOR_REPORTS_QUEUE_DEPTH_PROBE = "periodic_instructor_reports.backpressure.InMemoryQueueDepthProbe"
+PERIODIC_INSTRUCTOR_REPORTS_COURSE_CATALOG_PROVIDER = "periodic_instructor_reports.catalog.InMemoryCourseCatalogProvider"
+PERIODIC_INSTRUCTOR_REPORTS_TRACER = "periodic_instructor_reports.tracing.InMemoryTracer"
+PERIODIC_INSTRUCTOR_REPORTS_COURSE_VERSION_PROVIDER = "periodic_instructor_reports.artifacts.InMemoryCourseVersionProvider"
+PERIODIC_INSTRUCTOR_REPORTS_REPORT_ARTIFACT_STORE = "periodic_instructor_reports.artifacts.InMemoryReportArtifactStore"
+PERIODIC_INSTRUCTOR_REPORTS_LOCK_BACKEND = "periodic_instructor_reports.locks.CacheLockBackend"
@@ -0,0 +1,112 @@
+from unittest.mock import Mock, patch
+
+from django.contrib.admin.sites import AdminSite
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django_celery_beat.models import IntervalSchedule, PeriodicTask
+
+from periodic_instructor_reports.admin import BoundedCountPaginator, PeriodicReportScheduleAdmin
+from periodic_instructor_reports.models import PeriodicReportSchedule, PeriodicReportTask
+from periodic_instructor_reports.tasks import run_schedules_now
+
+
+class PeriodicReportScheduleAdminTestCase(TestCase):
+    """
+    Test the `PeriodicReportSchedule` admin changelist and actions.
+    """
+
+    def setUp(self):
+        self.admin = PeriodicReportScheduleAdmin(PeriodicReportSchedule, AdminSite())
+        self.admin.message_user = Mock()
+
+        owner = User.objects.create(username="owner")
+        interval = IntervalSchedule.objects.create(every=1, period=IntervalSchedule.DAYS)
+
+        self.schedules = [
+            PeriodicReportSchedule.objects.create(
+                task=PeriodicReportTask.objects.create(name=f"test-{index}", path="test.task"),
+                interval=interval,
+                owner=owner,
+                course_ids=[f"course-v1:org+course+run{index}"],
+            )
+            for index in range(3)
+        ]
+
+    def test_courses_truncated(self):
+        """
+        Test the courses column lists only the first courses and selectors.
+        """
+
+        schedule = Mock()
+        schedule.course_ids = ["course-v1:a+b+c", "course-v1:d+e+f", "course-v1:g+h+i"]
+        schedule.course_selectors = ["org:x", "org:y"]
+
+        self.assertEqual(
+            self.admin.courses(schedule),
+            "course-v1:a+b+c, course-v1:d+e+f, course-v1:g+h+i and 2 more",
+        )
+
+    def test_search(self):
+        """
+        Test the schedules are searched by their task's name and their course IDs.
+        """
+
+        queryset, _ = self.admin.get_search_results(Mock(), PeriodicReportSchedule.objects.all(), "test-1")
+
+        self.assertEqual(list(queryset), [self.schedules[1]])
+
+        queryset, _ = self.admin.get_search_results(Mock(), PeriodicReportSchedule.objects.all(), "org+course+run2")
+
+        self.assertEqual(list(queryset), [self.schedules[2]])
+
+    def test_bounded_count(self):
+        """
+        Test the paginator stops counting at its maximum count.
+        """
+
+        paginator = BoundedCountPaginator(PeriodicReportSchedule.objects.order_by("id"), 1)
+        paginator.max_count = 2
+
+        self.assertEqual(paginator.count, 2)
+        self.assertEqual(paginator.num_pages, 2)
+
+    def test_disable_and_enable(self):
+        """
+        Test the actions update the periodic tasks of the selected schedules only.
+        """
+
+        queryset = PeriodicReportSchedule.objects.filter(id__in=[self.schedules[0].id, self.schedules[1].id])
+
+        self.admin.disable(Mock(), queryset)
+
+        enabled = dict(PeriodicTask.objects.filter(name__startswith="test-").values_list("name", "enabled"))
+        self.assertEqual(enabled, {"test-0": False, "test-1": False, "test-2": True})
+
+        self.admin.enable(Mock(), queryset)
+
+        self.assertFalse(PeriodicTask.objects.filter(enabled=False).exists())
+
+    @patch("periodic_instructor_reports.admin.run_schedules_now")
+    def test_run_now(self, mock_run_schedules_now):
+        """
+        Test the run now action dispatches the runs of the selected schedules by a single task.
+        """
+
+        queryset = PeriodicReportSchedule.objects.filter(id__in=[self.schedules[1].id, self.schedules[2].id])
+
+        self.admin.run_now(Mock(), queryset)
+
+        mock_run_schedules_now.delay.assert_called_once_with([self.schedules[1].id, self.schedules[2].id])
+
+    @patch("periodic_instructor_reports.tasks.periodic_task_wrapper")
+    def test_run_schedules_now(self, mock_wrapper):
+        """
+        Test a claimed run of every schedule is dispatched by the worker.
+        """
+
+        run_schedules_now([self.schedules[2].id])
+
+        mock_wrapper.apply_async.assert_called_once_with(
+            args=[self.schedules[2].id],
+            kwargs={"claimed": True},
+        )
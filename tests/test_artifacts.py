@@ -0,0 +1,220 @@
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from periodic_instructor_reports.artifacts import (
+    InMemoryCourseVersionProvider,
+    InMemoryReportArtifactStore,
+    evict_artifacts,
+    get_artifact_key,
+    record_artifact,
+    reuse_artifact,
+)
+from periodic_instructor_reports.models import ReportArtifact
+from periodic_instructor_reports.tasks import call_report_task
+
+
+class ReportArtifactCacheTestCase(TestCase):
+    """
+    Test reusing the reports of courses with unchanged data.
+    """
+
+    course_id = "course-v1:test+course+2021_T1"
+
+    def setUp(self):
+        InMemoryCourseVersionProvider.versions = {self.course_id: "v1"}
+        InMemoryReportArtifactStore.files = {}
+
+        self.schedule = Mock()
+        self.schedule.task.path = "test.report_task"
+        self.schedule.task.artifact_name = "grade_report"
+        self.schedule.arguments = ["arg1"]
+        self.schedule.keyword_arguments = {"kw1": 1}
+        self.schedule.course_time_budget = None
+
+    def generate_report(self, parent_dir: str) -> None:
+        """
+        Helper function recording a report generated for the course in the folder.
+        """
+
+        generated_at = timezone.now()
+        InMemoryReportArtifactStore.files[f"{parent_dir}/{self.schedule.task.artifact_name}.csv"] = (
+            self.course_id,
+            generated_at,
+        )
+        record_artifact(get_artifact_key(self.schedule, self.course_id), parent_dir, generated_at)
+
+    def test_unknown_version(self):
+        """
+        Test reports of courses without a known version are not cached.
+        """
+
+        InMemoryCourseVersionProvider.versions = {}
+
+        self.assertIsNone(get_artifact_key(self.schedule, self.course_id))
+
+    def test_arguments_change_key(self):
+        """
+        Test reports of calls with different arguments are cached separately.
+        """
+
+        key = get_artifact_key(self.schedule, self.course_id)
+        self.schedule.keyword_arguments = {"kw1": 2}
+
+        self.assertNotEqual(get_artifact_key(self.schedule, self.course_id), key)
+
+    def test_reuse_in_place(self):
+        """
+        Test a report in the same folder is reused without copying it.
+        """
+
+        self.generate_report("reports")
+
+        self.assertTrue(reuse_artifact(get_artifact_key(self.schedule, self.course_id), "reports"))
+        self.assertEqual(list(InMemoryReportArtifactStore.files), ["reports/grade_report.csv"])
+        self.assertEqual(ReportArtifact.objects.get().hits, 1)
+
+    def test_reuse_copies_to_new_folder(self):
+        """
+        Test a report is copied to the new upload folder.
+        """
+
+        self.generate_report("reports/2026/10/18")
+
+        self.assertTrue(reuse_artifact(get_artifact_key(self.schedule, self.course_id), "reports/2026/10/19"))
+        self.assertIn("reports/2026/10/19/grade_report.csv", InMemoryReportArtifactStore.files)
+
+    def test_no_artifact_name(self):
+        """
+        Test reports of tasks without an artifact name are not cached.
+        """
+
+        self.schedule.task.artifact_name = ""
+
+        self.assertIsNone(get_artifact_key(self.schedule, self.course_id))
+
+    def test_tasks_sharing_folder(self):
+        """
+        Test the reports of two tasks for the same course in the same folder are reused separately.
+        """
+
+        self.generate_report("reports")
+        self.schedule.task.path = "test.problem_report_task"
+        self.schedule.task.artifact_name = "problem_grade_report"
+
+        self.assertFalse(reuse_artifact(get_artifact_key(self.schedule, self.course_id), "reports"))
+
+        self.generate_report("reports")
+
+        self.assertTrue(reuse_artifact(get_artifact_key(self.schedule, self.course_id), "reports/new"))
+        self.assertEqual(
+            [path for path in InMemoryReportArtifactStore.files if path.startswith("reports/new/")],
+            ["reports/new/problem_grade_report.csv"],
+        )
+
+        self.schedule.task.path = "test.report_task"
+        self.schedule.task.artifact_name = "grade_report"
+
+        self.assertTrue(reuse_artifact(get_artifact_key(self.schedule, self.course_id), "reports/other"))
+        self.assertEqual(
+            [path for path in InMemoryReportArtifactStore.files if path.startswith("reports/other/")],
+            ["reports/other/grade_report.csv"],
+        )
+        self.assertEqual(ReportArtifact.objects.get(task_path="test.report_task").filenames, ["grade_report.csv"])
+
+    def test_version_changed(self):
+        """
+        Test a report generated at another version of the course's data is not reused.
+        """
+
+        self.generate_report("reports")
+        InMemoryCourseVersionProvider.versions = {self.course_id: "v2"}
+
+        self.assertFalse(reuse_artifact(get_artifact_key(self.schedule, self.course_id), "reports"))
+
+    def test_files_missing(self):
+        """
+        Test a report whose files are not in the store is not reused.
+        """
+
+        self.generate_report("reports")
+        InMemoryReportArtifactStore.files = {}
+
+        self.assertFalse(reuse_artifact(get_artifact_key(self.schedule, self.course_id), "reports"))
+
+    def test_evict_by_age(self):
+        """
+        Test the artifacts unused for longer than the maximum age are evicted.
+        """
+
+        self.generate_report("reports")
+
+        with override_settings(PERIODIC_INSTRUCTOR_REPORTS_ARTIFACT_CACHE_MAX_AGE=60):
+            self.assertEqual(evict_artifacts(timezone.now() + timedelta(seconds=30)), 0)
+            self.assertEqual(evict_artifacts(timezone.now() + timedelta(seconds=90)), 1)
+
+    @override_settings(PERIODIC_INSTRUCTOR_REPORTS_ARTIFACT_CACHE_MAX_ENTRIES=1)
+    def test_evict_least_recently_used(self):
+        """
+        Test the least recently used artifacts over the maximum number of entries are evicted.
+        """
+
+        self.generate_report("reports")
+        self.schedule.task.path = "test.other_report_task"
+        self.generate_report("reports")
+
+        self.assertEqual(evict_artifacts(), 1)
+        self.assertEqual(ReportArtifact.objects.get().task_path, "test.other_report_task")
+
+    @patch("periodic_instructor_reports.tasks.get_task_call")
+    def test_call_report_task_reuses_report(self, mock_get_task_call):
+        """
+        Test the report task is called again only after the course's data changed.
+        """
+
+        mock_report_task = Mock()
+        mock_get_task_call.return_value = ([self.course_id], {"upload_parent_dir": "reports"})
+        self.schedule.task.cache_artifacts = True
+
+        def report_task(course_id, upload_parent_dir):
+            InMemoryReportArtifactStore.files[f"{upload_parent_dir}/grade_report.csv"] = (course_id, timezone.now())
+            mock_report_task(course_id, upload_parent_dir)
+
+        call_report_task(self.schedule, report_task, self.course_id)
+        call_report_task(self.schedule, report_task, self.course_id)
+
+        InMemoryCourseVersionProvider.versions = {self.course_id: "v2"}
+        call_report_task(self.schedule, report_task, self.course_id)
+
+        self.assertEqual(mock_report_task.call_count, 2)
+
+        artifact = ReportArtifact.objects.get()
+        self.assertEqual((artifact.hits, artifact.misses, artifact.version), (1, 2, "v2"))
+
+    @patch("periodic_instructor_reports.tasks.get_task_call")
+    def test_call_report_task_reuses_submitted_report(self, mock_get_task_call):
+        """
+        Test a report written by an instructor task after the call returned is reused by the next run.
+        """
+
+        mock_get_task_call.return_value = ([self.course_id], {"upload_parent_dir": "reports"})
+        self.schedule.task.cache_artifacts = True
+        submit_report_task = Mock(return_value=Mock(task_id="instructor-task"))
+
+        call_report_task(self.schedule, submit_report_task, self.course_id)
+
+        self.assertEqual(ReportArtifact.objects.get().filenames, [])
+
+        # The instructor task writes the report on another worker
+        InMemoryReportArtifactStore.files["reports/grade_report_2026.csv"] = (self.course_id, timezone.now())
+
+        call_report_task(self.schedule, submit_report_task, self.course_id)
+        call_report_task(self.schedule, submit_report_task, self.course_id)
+
+        self.assertEqual(submit_report_task.call_count, 1)
+
+        artifact = ReportArtifact.objects.get()
+        self.assertEqual((artifact.hits, artifact.misses), (2, 1))
+        self.assertEqual(artifact.filenames, ["grade_report_2026.csv"])
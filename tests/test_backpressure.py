@@ -0,0 +1,94 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from periodic_instructor_reports.backpressure import (
+    DECISION_DEFER,
+    DECISION_DISPATCH,
+    DECISION_SHED,
+    InMemoryQueueDepthProbe,
+    check_backpressure,
+)
+
+
+class CheckBackpressureTestCase(TestCase):
+    """
+    Test deciding whether a report task can be dispatched.
+    """
+
+    queue_name = "test.queue"
+
+    def setUp(self):
+        InMemoryQueueDepthProbe.depths = {}
+
+    def get_mock_report_task(self, defer_queue_depth=None, shed_queue_depth=None) -> object:
+        """
+        Helper function returning a mock report task object.
+        """
+
+        report_task = Mock()
+        report_task.queue_name = self.queue_name
+        report_task.defer_queue_depth = defer_queue_depth
+        report_task.shed_queue_depth = shed_queue_depth
+
+        return report_task
+
+    def test_no_thresholds(self):
+        """
+        Test the run is dispatched if no thresholds are set.
+        """
+
+        InMemoryQueueDepthProbe.depths = {self.queue_name: 10000}
+        report_task = self.get_mock_report_task()
+
+        self.assertEqual(check_backpressure(report_task), DECISION_DISPATCH)
+
+    def test_below_thresholds(self):
+        """
+        Test the run is dispatched if the queue is not backlogged.
+        """
+
+        InMemoryQueueDepthProbe.depths = {self.queue_name: 99}
+        report_task = self.get_mock_report_task(defer_queue_depth=100, shed_queue_depth=1000)
+
+        self.assertEqual(check_backpressure(report_task), DECISION_DISPATCH)
+
+    def test_defer(self):
+        """
+        Test the run is deferred if the queue reached the defer threshold.
+        """
+
+        InMemoryQueueDepthProbe.depths = {self.queue_name: 100}
+        report_task = self.get_mock_report_task(defer_queue_depth=100, shed_queue_depth=1000)
+
+        self.assertEqual(check_backpressure(report_task), DECISION_DEFER)
+
+    def test_defer_too_many_times(self):
+        """
+        Test the run is shed if it was deferred too many times already.
+        """
+
+        InMemoryQueueDepthProbe.depths = {self.queue_name: 100}
+        report_task = self.get_mock_report_task(defer_queue_depth=100)
+
+        self.assertEqual(check_backpressure(report_task, deferrals=3), DECISION_SHED)
+
+    def test_shed(self):
+        """
+        Test the run is shed if the queue reached the shed threshold.
+        """
+
+        InMemoryQueueDepthProbe.depths = {self.queue_name: 1000}
+        report_task = self.get_mock_report_task(defer_queue_depth=100, shed_queue_depth=1000)
+
+        self.assertEqual(check_backpressure(report_task), DECISION_SHED)
+
+    @patch.object(InMemoryQueueDepthProbe, "get_depth")
+    def test_probe_failure(self, mock_get_depth):
+        """
+        Test the run is dispatched if the queue depth cannot be determined.
+        """
+
+        mock_get_depth.side_effect = ConnectionError("broker is down")
+        report_task = self.get_mock_report_task(defer_queue_depth=100, shed_queue_depth=1000)
+
+        self.assertEqual(check_backpressure(report_task), DECISION_DISPATCH)
@@ -0,0 +1,162 @@
+from datetime import timedelta
+from unittest import TestCase
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+
+from periodic_instructor_reports.catalog import (
+    INDEX_CACHE_KEY,
+    InMemoryCourseCatalogProvider,
+    get_index,
+    resolve_selector,
+    resolve_selectors,
+)
+
+
+class ResolveSelectorTestCase(TestCase):
+    """
+    Test resolving course selectors against a sorted list of course IDs.
+    """
+
+    course_ids = sorted([
+        "ORG/course/run",
+        "course-v1:ORG+course1+2025_T1",
+        "course-v1:ORG+course1+2026_T1",
+        "course-v1:ORG+course2+2026_T2",
+        "course-v1:ORG2+course1+2026_T1",
+        "course-v1:OTHER+course1+2026_T1",
+    ])
+
+    def test_org_selector(self):
+        """
+        Test selecting every course of an organization.
+        """
+
+        self.assertEqual(resolve_selector("org:ORG", self.course_ids), [
+            "course-v1:ORG+course1+2025_T1",
+            "course-v1:ORG+course1+2026_T1",
+            "course-v1:ORG+course2+2026_T2",
+            "ORG/course/run",
+        ])
+
+    def test_pattern_selector(self):
+        """
+        Test selecting courses by a pattern.
+        """
+
+        self.assertEqual(resolve_selector("course-v1:ORG+*+2026*", self.course_ids), [
+            "course-v1:ORG+course1+2026_T1",
+            "course-v1:ORG+course2+2026_T2",
+        ])
+        self.assertEqual(resolve_selector("course-v1:*+course1+2026_T1", self.course_ids), [
+            "course-v1:ORG+course1+2026_T1",
+            "course-v1:ORG2+course1+2026_T1",
+            "course-v1:OTHER+course1+2026_T1",
+        ])
+
+    def test_exact_selector(self):
+        """
+        Test a selector without wildcards selects only the exact course.
+        """
+
+        self.assertEqual(resolve_selector("course-v1:ORG+course1+2026_T1", self.course_ids), [
+            "course-v1:ORG+course1+2026_T1",
+        ])
+        self.assertEqual(resolve_selector("course-v1:ORG+course1", self.course_ids), [])
+
+
+class CourseCatalogIndexTestCase(TestCase):
+    """
+    Test maintaining the course catalog index in the cache.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.modified = timezone.now() - timedelta(days=1)
+        InMemoryCourseCatalogProvider.courses = [
+            ("course-v1:ORG+course2+2026_T1", self.modified),
+            ("course-v1:ORG+course1+2026_T1", self.modified),
+        ]
+
+    def tearDown(self):
+        cache.clear()
+        InMemoryCourseCatalogProvider.courses = []
+
+    def test_build_index(self):
+        """
+        Test the index is built sorted from the whole catalog.
+        """
+
+        self.assertEqual(get_index()["course_ids"], [
+            "course-v1:ORG+course1+2026_T1",
+            "course-v1:ORG+course2+2026_T1",
+        ])
+
+    @override_settings(PERIODIC_INSTRUCTOR_REPORTS_CATALOG_REFRESH_SECONDS=0)
+    def test_refresh_index(self):
+        """
+        Test new courses are added to the index incrementally.
+        """
+
+        get_index()
+
+        InMemoryCourseCatalogProvider.courses = [
+            ("course-v1:ORG+course0+2026_T1", timezone.now() + timedelta(seconds=1)),
+        ]
+
+        self.assertEqual(resolve_selectors(["org:ORG"]), [
+            "course-v1:ORG+course0+2026_T1",
+            "course-v1:ORG+course1+2026_T1",
+            "course-v1:ORG+course2+2026_T1",
+        ])
+
+    def test_cached_index(self):
+        """
+        Test the catalog is not listed again until the refresh interval passed.
+        """
+
+        get_index()
+        InMemoryCourseCatalogProvider.courses = []
+
+        self.assertEqual(len(get_index()["course_ids"]), 2)
+
+    @override_settings(PERIODIC_INSTRUCTOR_REPORTS_CATALOG_SHARD_SIZE=1)
+    def test_sharded_index(self):
+        """
+        Test the index is stored in shards and read back in order.
+        """
+
+        get_index()
+        InMemoryCourseCatalogProvider.courses = []
+
+        self.assertEqual(cache.get(INDEX_CACHE_KEY)["shard_count"], 2)
+        self.assertEqual(get_index()["course_ids"], [
+            "course-v1:ORG+course1+2026_T1",
+            "course-v1:ORG+course2+2026_T1",
+        ])
+
+    @override_settings(PERIODIC_INSTRUCTOR_REPORTS_CATALOG_SHARD_SIZE=1)
+    def test_missing_shard(self):
+        """
+        Test the index is rebuilt if one of its shards was dropped from the cache.
+        """
+
+        get_index()
+        cache.delete(f"{INDEX_CACHE_KEY}:{cache.get(INDEX_CACHE_KEY)['version']}:1")
+        InMemoryCourseCatalogProvider.courses = InMemoryCourseCatalogProvider.courses[:1]
+
+        with self.assertLogs("periodic_instructor_reports.catalog", "WARNING"):
+            self.assertEqual(get_index()["course_ids"], ["course-v1:ORG+course2+2026_T1"])
+
+    def test_failed_write(self):
+        """
+        Test a failed write of the index is logged and the index is not used.
+        """
+
+        with patch("periodic_instructor_reports.catalog.cache.set_many", side_effect=lambda data, timeout: list(data)):
+            with self.assertLogs("periodic_instructor_reports.catalog", "WARNING"):
+                get_index()
+
+        self.assertIsNone(cache.get(INDEX_CACHE_KEY))
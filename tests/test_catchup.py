@@ -0,0 +1,105 @@
+from datetime import timedelta
+from unittest import TestCase
+from unittest.mock import Mock
+
+from django.utils import timezone
+
+from periodic_instructor_reports.catchup import (
+    CLAIM_CATCH_UP,
+    CLAIM_DUPLICATE,
+    CLAIM_MISSED,
+    CLAIM_RUN,
+    claim_run,
+    get_catch_up_countdown,
+)
+from periodic_instructor_reports.models import PeriodicReportSchedule
+
+
+class ClaimRunTestCase(TestCase):
+    """
+    Test claiming a schedule for a run triggered by beat.
+    """
+
+    def get_mock_schedule(self, last_run_at=None, catch_up_policy=PeriodicReportSchedule.CATCH_UP_ONE):
+        """
+        Helper function returning a mock daily schedule object.
+        """
+
+        mock_schedule = Mock()
+        mock_schedule.id = 1
+        mock_schedule.interval.every = 1
+        mock_schedule.interval.period = "days"
+        mock_schedule.last_run_at = last_run_at
+        mock_schedule.catch_up_policy = catch_up_policy
+        mock_schedule.claim_last_run.return_value = True
+
+        return mock_schedule
+
+    def test_first_run(self):
+        """
+        Test the first run of a schedule is executed.
+        """
+
+        self.assertEqual(claim_run(self.get_mock_schedule()), CLAIM_RUN)
+
+    def test_regular_run(self):
+        """
+        Test a run on time is executed.
+        """
+
+        now = timezone.now()
+        mock_schedule = self.get_mock_schedule(last_run_at=now - timedelta(days=1, minutes=1))
+
+        self.assertEqual(claim_run(mock_schedule, now), CLAIM_RUN)
+        mock_schedule.claim_last_run.assert_called_once_with(mock_schedule.last_run_at, now)
+
+    def test_duplicate_run(self):
+        """
+        Test a run shortly after the previous one is a duplicate.
+        """
+
+        now = timezone.now()
+        mock_schedule = self.get_mock_schedule(last_run_at=now - timedelta(seconds=5))
+
+        self.assertEqual(claim_run(mock_schedule, now), CLAIM_DUPLICATE)
+        mock_schedule.claim_last_run.assert_not_called()
+
+    def test_claimed_by_another_run(self):
+        """
+        Test a run is a duplicate if another run claimed the schedule concurrently.
+        """
+
+        now = timezone.now()
+        mock_schedule = self.get_mock_schedule(last_run_at=now - timedelta(days=1))
+        mock_schedule.claim_last_run.return_value = False
+
+        self.assertEqual(claim_run(mock_schedule, now), CLAIM_DUPLICATE)
+
+    def test_missed_runs(self):
+        """
+        Test missed runs are handled according to the catch-up policy.
+        """
+
+        now = timezone.now()
+        last_run_at = now - timedelta(days=4)
+
+        self.assertEqual(claim_run(self.get_mock_schedule(last_run_at), now), CLAIM_CATCH_UP)
+        self.assertEqual(
+            claim_run(self.get_mock_schedule(last_run_at, PeriodicReportSchedule.CATCH_UP_NONE), now),
+            CLAIM_MISSED,
+        )
+
+    def test_catch_up_countdown(self):
+        """
+        Test catch-up runs of consecutive schedules are spread within the configured window.
+        """
+
+        countdowns = set()
+
+        for schedule_id in range(1, 11):
+            mock_schedule = self.get_mock_schedule()
+            mock_schedule.id = schedule_id
+            countdowns.add(get_catch_up_countdown(mock_schedule))
+
+        self.assertEqual(len(countdowns), 10)
+        self.assertTrue(all(0 <= countdown < 900 for countdown in countdowns))
@@ -0,0 +1,122 @@
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from periodic_instructor_reports.costs import (
+    bin_pack,
+    get_duration_estimates,
+    order_longest_first,
+    record_duration,
+    record_pending_task,
+)
+from periodic_instructor_reports.models import CourseReportDuration
+from periodic_instructor_reports.tasks import call_report_task
+
+
+class DurationEstimateTestCase(TestCase):
+    """
+    Test recording rolling duration estimates.
+    """
+
+    task_path = "test.report_task"
+    course_id = "course-v1:test+course+2021_T1"
+
+    def test_record_duration(self):
+        """
+        Test the estimate is the exponentially weighted moving average of the durations.
+        """
+
+        record_duration(self.task_path, self.course_id, 10.0)
+        course_duration = record_duration(self.task_path, self.course_id, 20.0)
+
+        self.assertEqual(course_duration.samples, 2)
+        self.assertAlmostEqual(course_duration.estimate, 13.0)
+        self.assertEqual(
+            get_duration_estimates(self.task_path, [self.course_id, "course-v1:test+unknown+2021_T1"]),
+            {self.course_id: 13.0},
+        )
+
+
+    def test_record_lower_bound(self):
+        """
+        Test the duration of an interrupted call only raises the estimate and is not counted as a sample.
+        """
+
+        record_duration(self.task_path, self.course_id, 10.0)
+        course_duration = record_duration(self.task_path, self.course_id, 5.0, lower_bound=True)
+
+        self.assertEqual((course_duration.estimate, course_duration.samples), (10.0, 1))
+
+        course_duration = record_duration(self.task_path, self.course_id, 30.0, lower_bound=True)
+
+        self.assertEqual((course_duration.estimate, course_duration.samples), (30.0, 1))
+
+
+    @patch("periodic_instructor_reports.costs.get_instructor_task_model")
+    def test_instructor_task_duration(self, mock_get_model):
+        """
+        Test the duration of a submitted instructor task is recorded once it finished successfully.
+        """
+
+        created = timezone.now()
+        finished_tasks = mock_get_model.return_value.objects.filter.return_value.values_list
+        finished_tasks.return_value = []
+
+        record_pending_task(self.task_path, self.course_id, "task-1")
+
+        self.assertEqual(get_duration_estimates(self.task_path, [self.course_id]), {})
+
+        finished_tasks.return_value = [("task-1", "SUCCESS", created, created + timedelta(seconds=600))]
+
+        self.assertEqual(get_duration_estimates(self.task_path, [self.course_id]), {self.course_id: 600.0})
+        self.assertEqual(CourseReportDuration.objects.get().pending_task_id, "")
+
+        record_pending_task(self.task_path, self.course_id, "task-2")
+        finished_tasks.return_value = [("task-2", "FAILURE", created, created + timedelta(seconds=5))]
+
+        self.assertEqual(get_duration_estimates(self.task_path, [self.course_id]), {self.course_id: 600.0})
+        self.assertEqual(CourseReportDuration.objects.get().pending_task_id, "")
+
+    @patch("periodic_instructor_reports.tasks.record_duration")
+    def test_call_submitting_instructor_task(self, mock_record_duration):
+        """
+        Test the duration of a call submitting an instructor task is not recorded.
+        """
+
+        schedule = Mock()
+        schedule.task.path = self.task_path
+        schedule.task.cache_artifacts = False
+        schedule.arguments = []
+        schedule.keyword_arguments = {}
+        schedule.course_time_budget = None
+
+        call_report_task(schedule, Mock(return_value=Mock(task_id="task-1")), self.course_id)
+
+        mock_record_duration.assert_not_called()
+        self.assertEqual(CourseReportDuration.objects.get().pending_task_id, "task-1")
+
+
+class CallOrderingTestCase(TestCase):
+    """
+    Test ordering and distributing the report task calls.
+    """
+
+    estimates = {"a": 1.0, "b": 8.0, "c": 3.0, "d": 4.0}
+
+    def test_order_longest_first(self):
+        """
+        Test the courses are ordered longest first, unknown courses get the mean estimate.
+        """
+
+        self.assertEqual(order_longest_first(["a", "b", "c", "d", "e"], self.estimates), ["b", "d", "e", "c", "a"])
+
+    def test_bin_pack(self):
+        """
+        Test the courses are split into batches of balanced total duration.
+        """
+
+        self.assertEqual(bin_pack(["a", "b", "c", "d"], self.estimates, 2), [["b"], ["d", "c", "a"]])
+        self.assertEqual(bin_pack(["a", "b"], self.estimates, 4), [["b"], ["a"]])
+        self.assertEqual(bin_pack(["a", "b"], self.estimates, 0), [["b", "a"]])
@@ -0,0 +1,169 @@
+import threading
+import time
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django_celery_beat.models import IntervalSchedule
+
+from periodic_instructor_reports.deadlines import (
+    CourseTimeBudgetExceeded,
+    carry_over,
+    get_call_budget,
+    order_carried_over_first,
+    time_budget,
+)
+from periodic_instructor_reports.models import (
+    CourseReportDuration,
+    PeriodicReportSchedule,
+    PeriodicReportTask,
+    ReportTimeout,
+)
+from periodic_instructor_reports.tasks import call_report_task, periodic_task_wrapper
+
+
+class TimeBudgetTestCase(TestCase):
+    """
+    Test interrupting calls exceeding their time budget.
+    """
+
+    def test_interrupts_call(self):
+        """
+        Test a call running longer than its budget is interrupted.
+        """
+
+        started_at = time.monotonic()
+
+        with self.assertRaises(CourseTimeBudgetExceeded):
+            with time_budget(0.05):
+                time.sleep(5)
+
+        self.assertLess(time.monotonic() - started_at, 1)
+
+    def test_no_budget(self):
+        """
+        Test a call without a budget is not interrupted.
+        """
+
+        with time_budget(None):
+            time.sleep(0.01)
+
+    def test_not_main_thread(self):
+        """
+        Test a call outside of the main thread is not interrupted, but a warning is logged.
+        """
+
+        def call():
+            with time_budget(0.01):
+                time.sleep(0.05)
+
+        with self.assertLogs("periodic_instructor_reports.deadlines", "WARNING"):
+            thread = threading.Thread(target=call)
+            thread.start()
+            thread.join()
+
+    def test_call_budget(self):
+        """
+        Test the budget of a call is limited by the time left until the deadline.
+        """
+
+        schedule = Mock()
+        schedule.course_time_budget = 60
+
+        self.assertEqual(get_call_budget(schedule), 60)
+        self.assertAlmostEqual(get_call_budget(schedule, time.time() + 10), 10, delta=1)
+
+        schedule.course_time_budget = None
+
+        self.assertIsNone(get_call_budget(schedule))
+
+    def test_order_carried_over_first(self):
+        """
+        Test the courses carried over are called first, keeping the order otherwise.
+        """
+
+        self.assertEqual(order_carried_over_first(["a", "b", "c", "d"], ["c", "x"]), ["c", "a", "b", "d"])
+
+
+class RunDeadlineTestCase(TestCase):
+    """
+    Test handing off courses not called before the run deadline.
+    """
+
+    course_ids = ["course-v1:test+course1+run", "course-v1:test+course2+run", "course-v1:test+course3+run"]
+
+    def setUp(self):
+        cache.clear()
+
+        self.schedule = PeriodicReportSchedule.objects.create(
+            task=PeriodicReportTask.objects.create(name="test", path="test.task"),
+            owner=User.objects.create(username="owner"),
+            interval=IntervalSchedule.objects.create(every=1, period=IntervalSchedule.DAYS),
+            course_ids=self.course_ids,
+            run_deadline=600,
+        )
+
+    def test_carry_over(self):
+        """
+        Test the courses are added to the ones already carried over and every one is recorded.
+        """
+
+        carry_over(self.schedule, self.course_ids[:2], 600.0)
+        carry_over(self.schedule, self.course_ids[1:], 700.0)
+
+        self.schedule.refresh_from_db()
+
+        self.assertEqual(self.schedule.carried_over_course_ids, self.course_ids)
+        self.assertEqual(
+            ReportTimeout.objects.filter(kind=ReportTimeout.KIND_DEADLINE).count(), 4
+        )
+
+    @patch("periodic_instructor_reports.tasks.get_function_from_path")
+    def test_courses_handed_off(self, mock_get_function):
+        """
+        Test the courses left after the deadline are called first by the next run.
+        """
+
+        mock_report_task = mock_get_function.return_value
+
+        with patch("periodic_instructor_reports.tasks.is_past_deadline", side_effect=[False, True]):
+            periodic_task_wrapper(self.schedule.id, claimed=True)
+
+        self.schedule.refresh_from_db()
+
+        self.assertEqual(mock_report_task.call_count, 1)
+        self.assertEqual(self.schedule.carried_over_course_ids, self.course_ids[1:])
+
+        mock_report_task.reset_mock()
+        periodic_task_wrapper(self.schedule.id, claimed=True)
+
+        self.schedule.refresh_from_db()
+
+        self.assertEqual(
+            [str(task_call.args[0]) for task_call in mock_report_task.call_args_list],
+            [*self.course_ids[1:], self.course_ids[0]],
+        )
+        self.assertEqual(self.schedule.carried_over_course_ids, [])
+
+    def test_call_interrupted(self):
+        """
+        Test a call exceeding the course time budget is interrupted and recorded.
+        """
+
+        schedule = Mock()
+        schedule.id = self.schedule.id
+        schedule.task.path = "test.task"
+        schedule.task.cache_artifacts = False
+        schedule.arguments = []
+        schedule.keyword_arguments = {}
+        schedule.course_time_budget = 0.05
+
+        call_report_task(schedule, lambda *args, **kwargs: time.sleep(5), self.course_ids[0])
+
+        timeout = ReportTimeout.objects.get()
+        self.assertEqual((timeout.course_id, timeout.kind), (self.course_ids[0], ReportTimeout.KIND_BUDGET))
+        self.assertLess(timeout.elapsed, 1)
+
+        course_duration = CourseReportDuration.objects.get()
+        self.assertEqual((course_duration.estimate, course_duration.samples), (timeout.elapsed, 0))
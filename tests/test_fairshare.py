@@ -0,0 +1,226 @@
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django_celery_beat.models import IntervalSchedule
+from opaque_keys.edx.locator import CourseLocator
+
+from periodic_instructor_reports.fairshare import (
+    DISPATCH_LOCK_KEY,
+    enqueue_report_calls,
+    heartbeat_report_call,
+    select_report_calls,
+    start_report_calls,
+)
+from periodic_instructor_reports.models import (
+    PendingReportCall,
+    PeriodicReportSchedule,
+    PeriodicReportTask,
+)
+from periodic_instructor_reports.tasks import run_report_call
+
+
+class SelectReportCallsTestCase(TestCase):
+    """
+    Test selecting the pending calls by the groups' fair share.
+    """
+
+    def get_mock_calls(self, *groups) -> list:
+        """
+        Helper function returning mock pending calls of the given groups.
+        """
+
+        mock_calls = []
+
+        for call_id, group in enumerate(groups):
+            mock_call = Mock()
+            mock_call.id = call_id
+            mock_call.group = group
+            mock_calls.append(mock_call)
+
+        return mock_calls
+
+    def test_equal_share(self):
+        """
+        Test a group with many calls does not starve a group with a single call.
+        """
+
+        mock_calls = self.get_mock_calls("big", "big", "big", "big", "small")
+        selected_calls = select_report_calls(mock_calls, {}, 2)
+
+        self.assertEqual([mock_call.group for mock_call in selected_calls], ["big", "small"])
+
+    def test_running_calls(self):
+        """
+        Test the calls already running count towards the group's share.
+        """
+
+        mock_calls = self.get_mock_calls("big", "big", "small")
+        selected_calls = select_report_calls(mock_calls, {"small": 2}, 2)
+
+        self.assertEqual([mock_call.group for mock_call in selected_calls], ["big", "big"])
+
+    @override_settings(PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_WEIGHTS={"big": 3})
+    def test_weighted_share(self):
+        """
+        Test groups get a share of the slots proportional to their weight.
+        """
+
+        mock_calls = self.get_mock_calls(*(["small"] * 4 + ["big"] * 4))
+        selected_calls = select_report_calls(mock_calls, {}, 4)
+
+        self.assertEqual(sorted(mock_call.group for mock_call in selected_calls), ["big", "big", "big", "small"])
+
+
+@override_settings(
+    PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_GROUP_BY="org",
+    PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_CONCURRENCY=2,
+)
+class StartReportCallsTestCase(TestCase):
+    """
+    Test enqueueing and starting report calls.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+        owner = User.objects.create(username="owner")
+        interval = IntervalSchedule.objects.create(every=1, period=IntervalSchedule.DAYS)
+        task = PeriodicReportTask.objects.create(name="test", path="test.task")
+
+        self.schedule = PeriodicReportSchedule.objects.create(
+            task=task,
+            owner=owner,
+            interval=interval,
+            course_ids=[],
+        )
+
+    def test_start_report_calls(self):
+        """
+        Test the calls are started up to the concurrency limit, alternating between organizations.
+        """
+
+        enqueue_report_calls(self.schedule, [
+            CourseLocator("big", "course1", "run"),
+            CourseLocator("big", "course2", "run"),
+            CourseLocator("small", "course", "run"),
+        ])
+
+        started_calls = start_report_calls()
+
+        self.assertEqual([started_call.group for started_call in started_calls], ["big", "small"])
+        self.assertEqual(start_report_calls(), [])
+        self.assertEqual(
+            PendingReportCall.objects.filter(status=PendingReportCall.STATUS_RUNNING).count(), 2
+        )
+
+        started_calls[0].delete()
+
+        self.assertEqual([started_call.course_id for started_call in start_report_calls()], [
+            "course-v1:big+course2+run",
+        ])
+
+    def test_enqueue_skips_queued_courses(self):
+        """
+        Test a course is not enqueued again while a call of the schedule for it is waiting or running.
+        """
+
+        course_keys = [CourseLocator("org", "course1", "run"), CourseLocator("org", "course2", "run")]
+
+        self.assertEqual(enqueue_report_calls(self.schedule, course_keys[:1]), 1)
+        start_report_calls()
+
+        self.assertEqual(enqueue_report_calls(self.schedule, course_keys), 1)
+        self.assertEqual(enqueue_report_calls(self.schedule, course_keys), 0)
+        self.assertEqual(PendingReportCall.objects.count(), 2)
+
+    @override_settings(PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_CONCURRENCY=1)
+    def test_concurrent_dispatchers(self):
+        """
+        Test a dispatcher does not start calls while another one is in progress, which starts them instead.
+        """
+
+        enqueue_report_calls(self.schedule, [CourseLocator("org", "course", "run")])
+        cache.add(DISPATCH_LOCK_KEY, True)
+
+        self.assertEqual(start_report_calls(), [])
+
+        cache.delete(DISPATCH_LOCK_KEY)
+        start_report_calls()
+
+        self.assertEqual(
+            PendingReportCall.objects.filter(status=PendingReportCall.STATUS_RUNNING).count(), 1
+        )
+
+    @override_settings(PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_CONCURRENCY=2)
+    def test_starts_oldest_calls_of_groups(self):
+        """
+        Test the oldest calls of every group are started, without exceeding the concurrency limit.
+        """
+
+        enqueue_report_calls(self.schedule, [CourseLocator("big", f"course{index}", "run") for index in range(5)])
+        enqueue_report_calls(self.schedule, [CourseLocator("small", "course", "run")])
+
+        self.assertEqual([started_call.course_id for started_call in start_report_calls()], [
+            "course-v1:big+course0+run",
+            "course-v1:small+course+run",
+        ])
+        self.assertEqual(start_report_calls(), [])
+
+    @patch("periodic_instructor_reports.tasks.dispatch_report_calls.delay")
+    @patch("periodic_instructor_reports.tasks.get_function_from_path")
+    def test_run_report_call(self, mock_get_function, mock_dispatch_delay):
+        """
+        Test a started call calls the report task, frees its slot and dispatches the next calls.
+        """
+
+        course_key = CourseLocator("org", "course", "run")
+        enqueue_report_calls(self.schedule, [course_key])
+        started_call, = start_report_calls()
+
+        run_report_call(started_call.id)
+
+        mock_get_function.return_value.assert_called_once()
+        self.assertEqual(mock_get_function.return_value.call_args.args[0], course_key)
+        self.assertFalse(PendingReportCall.objects.exists())
+        mock_dispatch_delay.assert_called_once_with()
+
+    @override_settings(PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_CONCURRENCY=1)
+    def test_stale_calls_dropped(self):
+        """
+        Test a running call is dropped only if it did not send a heartbeat within the call timeout.
+        """
+
+        enqueue_report_calls(self.schedule, [
+            CourseLocator("org", "course1", "run"),
+            CourseLocator("org", "course2", "run"),
+        ])
+        started_call, = start_report_calls()
+
+        PendingReportCall.objects.filter(id=started_call.id).update(
+            started_at=timezone.now() - timedelta(hours=5),
+            heartbeat_at=timezone.now() - timedelta(hours=5),
+        )
+        self.assertTrue(heartbeat_report_call(started_call.id))
+
+        self.assertEqual(start_report_calls(), [])
+
+        PendingReportCall.objects.filter(id=started_call.id).update(heartbeat_at=timezone.now() - timedelta(hours=2))
+
+        self.assertEqual([call.course_id for call in start_report_calls()], ["course-v1:org+course2+run"])
+        self.assertFalse(heartbeat_report_call(started_call.id))
+
+    @patch("periodic_instructor_reports.tasks.dispatch_report_calls.delay")
+    @patch("periodic_instructor_reports.tasks.get_function_from_path")
+    def test_run_dropped_report_call(self, mock_get_function, mock_dispatch_delay):
+        """
+        Test a call dropped before it ran does not call the report task, but dispatches the next calls.
+        """
+
+        run_report_call(12345)
+
+        mock_get_function.assert_not_called()
+        mock_dispatch_delay.assert_called_once_with()
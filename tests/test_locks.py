@@ -0,0 +1,173 @@
+import time
+from datetime import timedelta
+from unittest.mock import Mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django_celery_beat.models import IntervalSchedule
+
+from django.contrib.auth.models import User
+from periodic_instructor_reports.locks import (
+    CacheLockBackend,
+    DatabaseLockBackend,
+    ScheduleLock,
+)
+from periodic_instructor_reports.models import (
+    PeriodicReportLock,
+    PeriodicReportSchedule,
+    PeriodicReportTask,
+)
+
+
+class LockBackendTestMixin:
+    """
+    Tests shared by every lock backend.
+    """
+
+    backend_class = None
+
+    def get_schedule_id(self) -> int:
+        """
+        Return the ID of the schedule the lock is tested with.
+        """
+
+        return 1
+
+    def get_lock(self) -> ScheduleLock:
+        """
+        Helper function returning a new lock of the tested schedule.
+        """
+
+        return ScheduleLock(self.get_schedule_id(), backend=self.backend_class())
+
+    def test_single_flight(self):
+        """
+        Test only one run can hold the lock at a time.
+        """
+
+        first_lock = self.get_lock()
+        second_lock = self.get_lock()
+
+        self.assertTrue(first_lock.acquire())
+        self.assertFalse(second_lock.acquire())
+        self.assertEqual(second_lock.get_holder().token, first_lock.token)
+
+        self.assertFalse(first_lock.release())
+        self.assertTrue(second_lock.acquire())
+        self.assertTrue(second_lock.heartbeat())
+        self.assertFalse(first_lock.heartbeat())
+
+    def test_coalesce(self):
+        """
+        Test a rerun can be requested only while the lock is held.
+        """
+
+        first_lock = self.get_lock()
+        second_lock = self.get_lock()
+
+        self.assertFalse(second_lock.request_rerun())
+
+        first_lock.acquire()
+        self.assertTrue(second_lock.request_rerun())
+        self.assertTrue(first_lock.release())
+        self.assertIsNone(second_lock.get_holder())
+
+
+    def test_batches(self):
+        """
+        Test the lock handed over to fanned out batches is kept until the last one finished.
+        """
+
+        first_lock = self.get_lock()
+        second_lock = self.get_lock()
+
+        first_lock.acquire()
+        self.assertTrue(first_lock.start_batches(2))
+        self.assertTrue(first_lock.heartbeat())
+
+        self.assertEqual(first_lock.finish_batch(), 1)
+        self.assertFalse(second_lock.acquire())
+        self.assertEqual(first_lock.finish_batch(), 0)
+
+        first_lock.release()
+        self.assertTrue(second_lock.acquire())
+        self.assertFalse(first_lock.start_batches(1))
+
+
+class ScheduleLockKeepAliveTestCase(TestCase):
+    """
+    Test renewing the lock while a report task call is running.
+    """
+
+    @override_settings(PERIODIC_INSTRUCTOR_REPORTS_LOCK_TIMEOUT=1)
+    def test_keep_alive(self):
+        """
+        Test the lock is renewed in the background until the call finished.
+        """
+
+        backend = Mock()
+        lock = ScheduleLock(1, backend=backend)
+
+        with lock.keep_alive():
+            time.sleep(0.8)
+
+        renewals = backend.renew.call_count
+        time.sleep(0.5)
+
+        self.assertGreaterEqual(renewals, 2)
+        self.assertEqual(backend.renew.call_count, renewals)
+        backend.renew.assert_called_with(1, lock.token, 1)
+
+
+class CacheLockBackendTestCase(LockBackendTestMixin, TestCase):
+    """
+    Test the cache lock backend.
+    """
+
+    backend_class = CacheLockBackend
+
+    def setUp(self):
+        cache.clear()
+
+    def tearDown(self):
+        cache.clear()
+
+
+class DatabaseLockBackendTestCase(LockBackendTestMixin, TestCase):
+    """
+    Test the database lock backend.
+    """
+
+    backend_class = DatabaseLockBackend
+
+    def setUp(self):
+        owner = User.objects.create(username="owner")
+        interval = IntervalSchedule.objects.create(every=1, period=IntervalSchedule.DAYS)
+        task = PeriodicReportTask.objects.create(name="test", path="test.task")
+
+        self.schedule = PeriodicReportSchedule.objects.create(
+            task=task,
+            owner=owner,
+            interval=interval,
+            course_ids=[],
+        )
+
+    def get_schedule_id(self) -> int:
+        return self.schedule.id
+
+    def test_expired_lock(self):
+        """
+        Test an expired lock can be acquired by another run.
+        """
+
+        first_lock = self.get_lock()
+        second_lock = self.get_lock()
+
+        first_lock.acquire()
+        PeriodicReportLock.objects.filter(schedule=self.schedule).update(
+            expires_at=PeriodicReportLock.objects.get(schedule=self.schedule).acquired_at - timedelta(seconds=1)
+        )
+
+        self.assertIsNone(second_lock.get_holder())
+        self.assertTrue(second_lock.acquire())
+        self.assertFalse(first_lock.heartbeat())
@@ -0,0 +1,122 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django_celery_beat.models import IntervalSchedule
+
+from periodic_instructor_reports.costs import record_duration
+from periodic_instructor_reports.models import PeriodicReportSchedule, PeriodicReportTask
+from periodic_instructor_reports.simulation import (
+    Job,
+    ScheduleSpec,
+    get_jobs,
+    get_peak_concurrency,
+    get_required_workers,
+    get_task_durations,
+    simulate,
+)
+
+
+class SimulationTestCase(TestCase):
+    """
+    Test simulating the report tasks in virtual time.
+    """
+
+    def test_task_durations(self):
+        """
+        Test the tasks of a run depend on how the calls are dispatched.
+        """
+
+        call_durations = {"a": 30.0, "b": 20.0, "c": 10.0}
+
+        self.assertEqual(get_task_durations(call_durations), [60.0])
+        self.assertEqual(get_task_durations(call_durations, fan_out_slots=2), [30.0, 30.0])
+        self.assertEqual(get_task_durations(call_durations, fair_share=True), [30.0, 20.0, 10.0])
+
+    def test_jobs(self):
+        """
+        Test the schedules are triggered at their interval within the simulated days.
+        """
+
+        jobs = get_jobs([
+            ScheduleSpec(1, 12 * 3600, 3600, [60.0]),
+            ScheduleSpec(2, 24 * 3600, -3600, [30.0]),
+        ], 1)
+
+        self.assertEqual(jobs, [Job(1, 3600, 60.0), Job(1, 13 * 3600, 60.0), Job(2, 23 * 3600, 30.0)])
+
+    def test_simulate(self):
+        """
+        Test the queue wait and busy time of tasks executed by a limited number of workers.
+        """
+
+        jobs = [Job(1, 0, 3600.0), Job(2, 0, 3600.0), Job(3, 1800, 600.0)]
+
+        self.assertEqual(get_peak_concurrency(jobs), 3)
+
+        result = simulate(jobs, 2)
+        self.assertEqual(result.max_wait, 1800.0)
+        self.assertEqual(result.busy_seconds_by_hour[:2], [7200.0, 600.0])
+
+        self.assertEqual(get_required_workers(jobs, 1800), 2)
+        self.assertEqual(get_required_workers(jobs, 0), 3)
+        self.assertEqual(get_required_workers([], 0), 0)
+
+
+    def test_skip_overlapping_runs(self):
+        """
+        Test a run triggered while the previous run of the schedule is in progress is skipped.
+        """
+
+        jobs = get_jobs([ScheduleSpec(1, 3600, 0, [2400.0, 2400.0], skip_overlapping=True)], 1)
+
+        self.assertEqual(simulate(jobs, 2).skipped_jobs, 0)
+
+        result = simulate(jobs, 1)
+        self.assertEqual(result.skipped_jobs, 24)
+        self.assertEqual(result.max_wait, 2400.0)
+
+    def test_fair_share(self):
+        """
+        Test fair-share calls wait for a free slot, and a call still waiting or running is not repeated.
+        """
+
+        jobs = [Job(1, 0, 3600.0, 0, fair_share=True), Job(1, 0, 3600.0, 1, fair_share=True)]
+
+        self.assertEqual(simulate(jobs, 2).max_wait, 0.0)
+        self.assertEqual(simulate(jobs, 2, fair_share_concurrency=1).max_wait, 3600.0)
+        self.assertEqual(get_required_workers(jobs, 0, fair_share_concurrency=1), 2)
+
+        jobs.append(Job(1, 1800, 3600.0, 0, fair_share=True))
+
+        self.assertEqual(simulate(jobs, 2).skipped_jobs, 1)
+
+
+class SimulateReportCapacityCommandTestCase(TestCase):
+    """
+    Test the capacity planning management command.
+    """
+
+    def test_command(self):
+        """
+        Test the load caused by the schedules is reported.
+        """
+
+        owner = User.objects.create(username="owner")
+        interval = IntervalSchedule.objects.create(every=6, period=IntervalSchedule.HOURS)
+        task = PeriodicReportTask.objects.create(name="test", path="test.task")
+        course_ids = ["course-v1:test+course1+2021_T1", "course-v1:test+course2+2021_T1"]
+
+        PeriodicReportSchedule.objects.create(task=task, owner=owner, interval=interval, course_ids=course_ids)
+        record_duration(task.path, course_ids[0], 1800.0)
+
+        stdout = StringIO()
+        call_command("simulate_report_capacity", days=2, stdout=stdout)
+        output = stdout.getvalue()
+
+        self.assertIn("Report tasks: 8", output)
+        self.assertIn("Report tasks skipped as overlapping with 1 worker(s): 0", output)
+        self.assertIn("Worker-hours per day: 4.00", output)
+        self.assertIn("Peak concurrent report tasks: 1", output)
+        self.assertIn("Workers required for a 3600 seconds latency target: 1", output)
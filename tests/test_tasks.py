@@ -1,15 +1,25 @@
 import hashlib
-from datetime import date
+from datetime import date, timedelta
 from typing import Optional
 
 from unittest import TestCase
-from unittest.mock import Mock, patch, call
+from unittest.mock import ANY, Mock, patch, call
 
 from ccx_keys.locator import CCXLocator
+from django.core.cache import cache
+from django.test import TestCase as DjangoTestCase, override_settings
+from django.utils import timezone
 from opaque_keys.edx.locator import CourseLocator
+from periodic_instructor_reports.backpressure import DECISION_DEFER, DECISION_SHED
+from periodic_instructor_reports.catchup import get_catch_up_countdown
+from periodic_instructor_reports.costs import record_duration
+from periodic_instructor_reports.locks import ScheduleLock
+from periodic_instructor_reports.tracing import InMemoryTracer
 from periodic_instructor_reports.tasks import (
     create_fake_request,
     periodic_task_wrapper,
+    release_lock,
+    run_report_task_batch,
 )
 
 
@@ -31,7 +41,7 @@ class TaskUtilsTestCase(TestCase):
         self.assertEqual(request.META["REMOTE_ADDR"], "0.0.0.0")
 
 
-class PeriodicTaskWrapperTestCase(TestCase):
+class PeriodicTaskWrapperTestCase(DjangoTestCase):
     """
     Test periodic task execution wrapper.
     """
@@ -42,6 +52,9 @@ class PeriodicTaskWrapperTestCase(TestCase):
     ccx_course_id = "ccx-v1:edX+DemoX+Demo_Course+ccx@1"
     ccx_course_locator = CCXLocator.from_string(ccx_course_id)
 
+    def setUp(self):
+        cache.clear()
+
     def get_mock_schedule(self, schedule_id: int, owner: object, course_ids: Optional[list] = None) -> object:
         """
         Helper function returning a mock schedule object.
@@ -55,10 +68,24 @@ class PeriodicTaskWrapperTestCase(TestCase):
         mock_schedule.only_ccx = False
         mock_schedule.owner = owner
         mock_schedule.course_ids = scheduled_course_ids
+        mock_schedule.course_selectors = []
         mock_schedule.arguments = ["arg1", "arg2"]
         mock_schedule.keyword_arguments = {"kw1": 1, "kw2": 2}
+        mock_schedule.task.path = "test.report_task"
         mock_schedule.task.requires_request = False
+        mock_schedule.task.queue_name = ""
+        mock_schedule.task.defer_queue_depth = None
+        mock_schedule.task.shed_queue_depth = None
+        mock_schedule.task.cache_artifacts = False
         mock_schedule.upload_folder_prefix = ""
+        mock_schedule.fan_out_slots = 0
+        mock_schedule.run_deadline = None
+        mock_schedule.course_time_budget = None
+        mock_schedule.carried_over_course_ids = []
+        mock_schedule.interval.every = 1
+        mock_schedule.interval.period = "days"
+        mock_schedule.last_run_at = None
+        mock_schedule.claim_last_run.return_value = True
 
         return mock_schedule
 
@@ -245,3 +272,384 @@ class PeriodicTaskWrapperTestCase(TestCase):
             kw2=2,
             upload_parent_dir=mock_schedule.upload_folder_prefix,
         )
+
+    @patch("periodic_instructor_reports.tasks.periodic_task_wrapper.apply_async")
+    @patch("periodic_instructor_reports.tasks.check_backpressure")
+    @patch("periodic_instructor_reports.tasks.PeriodicReportSchedule")
+    @patch("periodic_instructor_reports.tasks.get_function_from_path")
+    def test_task_wrapper_deferred(self, mock_get_function, mock_schedules, mock_check, mock_apply_async):
+        """
+        Test the periodic report is deferred if the queue is backlogged.
+        """
+
+        owner = Mock()
+        schedule_id = 1
+
+        mock_report_task = Mock()
+        mock_get_function.return_value = mock_report_task
+        mock_check.return_value = DECISION_DEFER
+
+        mock_schedules.objects.get.return_value = self.get_mock_schedule(schedule_id, owner)
+
+        periodic_task_wrapper(schedule_id, deferrals=1)
+
+        mock_report_task.assert_not_called()
+        mock_apply_async.assert_called_once_with(
+            args=[schedule_id], kwargs={"deferrals": 2, "claimed": True}, countdown=300
+        )
+
+    @patch("periodic_instructor_reports.tasks.periodic_task_wrapper.apply_async")
+    @patch("periodic_instructor_reports.tasks.check_backpressure")
+    @patch("periodic_instructor_reports.tasks.PeriodicReportSchedule")
+    @patch("periodic_instructor_reports.tasks.get_function_from_path")
+    def test_task_wrapper_shed(self, mock_get_function, mock_schedules, mock_check, mock_apply_async):
+        """
+        Test the periodic report is skipped if the queue is heavily backlogged.
+        """
+
+        owner = Mock()
+        schedule_id = 1
+
+        mock_report_task = Mock()
+        mock_get_function.return_value = mock_report_task
+        mock_check.return_value = DECISION_SHED
+
+        mock_schedules.objects.get.return_value = self.get_mock_schedule(schedule_id, owner)
+
+        periodic_task_wrapper(schedule_id)
+
+        mock_report_task.assert_not_called()
+        mock_apply_async.assert_not_called()
+
+    @patch("periodic_instructor_reports.tasks.periodic_task_wrapper.apply_async")
+    @patch("periodic_instructor_reports.tasks.PeriodicReportSchedule")
+    @patch("periodic_instructor_reports.tasks.get_function_from_path")
+    def test_task_wrapper_overlap_skip(self, mock_get_function, mock_schedules, mock_apply_async):
+        """
+        Test an overlapping periodic run is skipped.
+        """
+
+        owner = Mock()
+        schedule_id = 1
+
+        mock_report_task = Mock()
+        mock_get_function.return_value = mock_report_task
+
+        mock_schedule = self.get_mock_schedule(schedule_id, owner)
+        mock_schedule.overlap_policy = mock_schedules.OVERLAP_SKIP
+        mock_schedules.objects.get.return_value = mock_schedule
+
+        ScheduleLock(schedule_id).acquire()
+        periodic_task_wrapper(schedule_id)
+
+        mock_report_task.assert_not_called()
+        mock_apply_async.assert_not_called()
+
+    @patch("periodic_instructor_reports.tasks.periodic_task_wrapper.apply_async")
+    @patch("periodic_instructor_reports.tasks.PeriodicReportSchedule")
+    @patch("periodic_instructor_reports.tasks.get_function_from_path")
+    def test_task_wrapper_overlap_queue(self, mock_get_function, mock_schedules, mock_apply_async):
+        """
+        Test overlapping periodic runs are queued behind the run in progress as a single run.
+        """
+
+        owner = Mock()
+        schedule_id = 1
+
+        mock_report_task = Mock()
+        mock_get_function.return_value = mock_report_task
+
+        mock_schedule = self.get_mock_schedule(schedule_id, owner)
+        mock_schedule.overlap_policy = mock_schedules.OVERLAP_QUEUE
+        mock_schedules.objects.get.return_value = mock_schedule
+
+        lock = ScheduleLock(schedule_id)
+        lock.acquire()
+        periodic_task_wrapper(schedule_id)
+        periodic_task_wrapper(schedule_id)
+
+        mock_report_task.assert_not_called()
+        mock_apply_async.assert_not_called()
+
+        # The run holding the lock dispatches the queued run once it finished
+        release_lock(mock_schedule, lock)
+
+        mock_apply_async.assert_called_once_with(args=[schedule_id], kwargs={"claimed": True})
+
+    @patch("periodic_instructor_reports.tasks.periodic_task_wrapper.apply_async")
+    @patch("periodic_instructor_reports.tasks.PeriodicReportSchedule")
+    @patch("periodic_instructor_reports.tasks.get_function_from_path")
+    def test_task_wrapper_overlap_coalesce(self, mock_get_function, mock_schedules, mock_apply_async):
+        """
+        Test an overlapping periodic run is coalesced into the run in progress.
+        """
+
+        owner = Mock()
+        schedule_id = 1
+
+        mock_report_task = Mock()
+        mock_get_function.return_value = mock_report_task
+
+        mock_schedule = self.get_mock_schedule(schedule_id, owner)
+        mock_schedule.overlap_policy = mock_schedules.OVERLAP_COALESCE
+        mock_schedules.objects.get.return_value = mock_schedule
+
+        lock = ScheduleLock(schedule_id)
+        lock.acquire()
+        periodic_task_wrapper(schedule_id)
+
+        mock_report_task.assert_not_called()
+        mock_apply_async.assert_not_called()
+
+        # The run holding the lock dispatches the coalesced run once it finished
+        self.assertTrue(lock.release())
+
+    @patch("periodic_instructor_reports.tasks.periodic_task_wrapper.apply_async")
+    @patch("periodic_instructor_reports.tasks.PeriodicReportSchedule")
+    @patch("periodic_instructor_reports.tasks.get_function_from_path")
+    def test_task_wrapper_duplicate_run(self, mock_get_function, mock_schedules, mock_apply_async):
+        """
+        Test a duplicate periodic run triggered shortly after the previous one is dropped.
+        """
+
+        owner = Mock()
+        schedule_id = 1
+
+        mock_report_task = Mock()
+        mock_get_function.return_value = mock_report_task
+
+        mock_schedule = self.get_mock_schedule(schedule_id, owner)
+        mock_schedule.last_run_at = timezone.now() - timedelta(hours=1)
+        mock_schedules.objects.get.return_value = mock_schedule
+
+        periodic_task_wrapper(schedule_id)
+
+        mock_report_task.assert_not_called()
+        mock_apply_async.assert_not_called()
+
+    @patch("periodic_instructor_reports.tasks.periodic_task_wrapper.apply_async")
+    @patch("periodic_instructor_reports.tasks.PeriodicReportSchedule")
+    @patch("periodic_instructor_reports.tasks.get_function_from_path")
+    def test_task_wrapper_catch_up_run(self, mock_get_function, mock_schedules, mock_apply_async):
+        """
+        Test missed periodic runs are collapsed into one delayed catch-up run.
+        """
+
+        owner = Mock()
+        schedule_id = 1
+
+        mock_report_task = Mock()
+        mock_get_function.return_value = mock_report_task
+
+        mock_schedule = self.get_mock_schedule(schedule_id, owner)
+        mock_schedule.last_run_at = timezone.now() - timedelta(days=3)
+        mock_schedule.catch_up_policy = mock_schedules.CATCH_UP_ONE
+        mock_schedules.objects.get.return_value = mock_schedule
+
+        periodic_task_wrapper(schedule_id)
+
+        mock_report_task.assert_not_called()
+        mock_apply_async.assert_called_once_with(
+            args=[schedule_id], kwargs={"claimed": True}, countdown=get_catch_up_countdown(mock_schedule)
+        )
+
+    @patch("periodic_instructor_reports.tasks.PeriodicReportSchedule")
+    @patch("periodic_instructor_reports.tasks.get_function_from_path")
+    def test_task_wrapper_longest_first(self, mock_get_function, mock_schedules):
+        """
+        Test the courses are called in the order of their estimated duration, the longest first.
+        """
+
+        owner = Mock()
+        schedule_id = 1
+        other_course_id = "course-v1:test+other+2021_T1"
+
+        mock_report_task = Mock()
+        mock_get_function.return_value = mock_report_task
+
+        mock_schedule = self.get_mock_schedule(schedule_id, owner, course_ids=[self.course_id, other_course_id])
+        mock_schedules.objects.get.return_value = mock_schedule
+
+        record_duration(mock_schedule.task.path, self.course_id, 1.0)
+        record_duration(mock_schedule.task.path, other_course_id, 60.0)
+
+        periodic_task_wrapper(schedule_id)
+
+        self.assertEqual(
+            [str(task_call.args[0]) for task_call in mock_report_task.call_args_list],
+            [other_course_id, self.course_id],
+        )
+
+    @patch("periodic_instructor_reports.tasks.run_report_task_batch.delay")
+    @patch("periodic_instructor_reports.tasks.PeriodicReportSchedule")
+    @patch("periodic_instructor_reports.tasks.get_function_from_path")
+    def test_task_wrapper_fan_out(self, mock_get_function, mock_schedules, mock_batch_delay):
+        """
+        Test the courses are split into batches executed by separate tasks.
+        """
+
+        owner = Mock()
+        schedule_id = 1
+        course_ids = [f"course-v1:test+course{index}+2021_T1" for index in range(3)]
+
+        mock_report_task = Mock()
+        mock_get_function.return_value = mock_report_task
+
+        mock_schedule = self.get_mock_schedule(schedule_id, owner, course_ids=course_ids)
+        mock_schedule.fan_out_slots = 2
+        mock_schedules.objects.get.return_value = mock_schedule
+
+        record_duration(mock_schedule.task.path, course_ids[0], 10.0)
+        record_duration(mock_schedule.task.path, course_ids[1], 5.0)
+        record_duration(mock_schedule.task.path, course_ids[2], 5.0)
+
+        periodic_task_wrapper(schedule_id)
+
+        mock_report_task.assert_not_called()
+        mock_batch_delay.assert_has_calls([
+            call(schedule_id, [course_ids[0]], deadline=None, lock_token=ANY),
+            call(schedule_id, [course_ids[1], course_ids[2]], deadline=None, lock_token=ANY),
+        ])
+
+    @patch("periodic_instructor_reports.tasks.run_report_task_batch.delay")
+    @patch("periodic_instructor_reports.tasks.PeriodicReportSchedule")
+    @patch("periodic_instructor_reports.tasks.get_function_from_path")
+    def test_task_wrapper_fan_out_holds_lock(self, mock_get_function, mock_schedules, mock_batch_delay):
+        """
+        Test overlapping runs are skipped until the last fanned out batch finished.
+        """
+
+        owner = Mock()
+        schedule_id = 1
+        course_ids = [f"course-v1:test+course{index}+2021_T1" for index in range(2)]
+
+        mock_report_task = Mock()
+        mock_get_function.return_value = mock_report_task
+
+        mock_schedule = self.get_mock_schedule(schedule_id, owner, course_ids=course_ids)
+        mock_schedule.fan_out_slots = 2
+        mock_schedule.overlap_policy = mock_schedules.OVERLAP_SKIP
+        mock_schedules.objects.get.return_value = mock_schedule
+
+        record_duration(mock_schedule.task.path, course_ids[0], 10.0)
+        record_duration(mock_schedule.task.path, course_ids[1], 5.0)
+
+        periodic_task_wrapper(schedule_id, claimed=True)
+        batch_calls = list(mock_batch_delay.call_args_list)
+
+        self.assertEqual(len(batch_calls), 2)
+
+        # The batches are still pending
+        periodic_task_wrapper(schedule_id, claimed=True)
+        self.assertEqual(mock_batch_delay.call_count, 2)
+
+        run_report_task_batch(*batch_calls[0].args, **batch_calls[0].kwargs)
+        periodic_task_wrapper(schedule_id, claimed=True)
+        self.assertEqual(mock_batch_delay.call_count, 2)
+
+        run_report_task_batch(*batch_calls[1].args, **batch_calls[1].kwargs)
+        periodic_task_wrapper(schedule_id, claimed=True)
+        self.assertEqual(mock_batch_delay.call_count, 4)
+        self.assertEqual(mock_report_task.call_count, 2)
+
+    @patch("periodic_instructor_reports.tasks.PeriodicReportSchedule")
+    @patch("periodic_instructor_reports.tasks.get_function_from_path")
+    def test_report_task_batch(self, mock_get_function, mock_schedules):
+        """
+        Test a fanned out batch calls the report task for every course in it.
+        """
+
+        owner = Mock()
+        schedule_id = 1
+
+        mock_report_task = Mock()
+        mock_get_function.return_value = mock_report_task
+
+        mock_schedule = self.get_mock_schedule(schedule_id, owner)
+        mock_schedules.objects.get.return_value = mock_schedule
+
+        run_report_task_batch(schedule_id, [self.course_id, self.ccx_course_id])
+
+        mock_report_task.assert_has_calls([
+            call(self.course_locator, "arg1", "arg2", kw1=1, kw2=2),
+            call(self.ccx_course_locator, "arg1", "arg2", kw1=1, kw2=2),
+        ])
+
+    @override_settings(PERIODIC_INSTRUCTOR_REPORTS_FAIR_SHARE_GROUP_BY="owner")
+    @patch("periodic_instructor_reports.tasks.dispatch_report_calls.delay")
+    @patch("periodic_instructor_reports.tasks.enqueue_report_calls")
+    @patch("periodic_instructor_reports.tasks.PeriodicReportSchedule")
+    @patch("periodic_instructor_reports.tasks.get_function_from_path")
+    def test_task_wrapper_fair_share(self, mock_get_function, mock_schedules, mock_enqueue, mock_dispatch_delay):
+        """
+        Test the calls are enqueued for fair share dispatching.
+        """
+
+        owner = Mock()
+        schedule_id = 1
+
+        mock_report_task = Mock()
+        mock_get_function.return_value = mock_report_task
+
+        mock_schedule = self.get_mock_schedule(schedule_id, owner)
+        mock_schedules.objects.get.return_value = mock_schedule
+
+        periodic_task_wrapper(schedule_id)
+
+        mock_report_task.assert_not_called()
+        mock_enqueue.assert_called_once_with(mock_schedule, [self.course_locator])
+        mock_dispatch_delay.assert_called_once_with()
+
+    @patch("periodic_instructor_reports.tasks.resolve_selectors")
+    @patch("periodic_instructor_reports.tasks.PeriodicReportSchedule")
+    @patch("periodic_instructor_reports.tasks.get_function_from_path")
+    def test_task_wrapper_course_selectors(self, mock_get_function, mock_schedules, mock_resolve_selectors):
+        """
+        Test the courses matching the schedule's selectors are included once.
+        """
+
+        owner = Mock()
+        schedule_id = 1
+        other_course_id = "course-v1:test+other+2021_T1"
+
+        mock_report_task = Mock()
+        mock_get_function.return_value = mock_report_task
+        mock_resolve_selectors.return_value = [self.course_id, other_course_id]
+
+        mock_schedule = self.get_mock_schedule(schedule_id, owner)
+        mock_schedule.course_selectors = ["org:test"]
+        mock_schedules.objects.get.return_value = mock_schedule
+
+        periodic_task_wrapper(schedule_id)
+
+        mock_resolve_selectors.assert_called_once_with(["org:test"])
+        self.assertEqual(
+            [str(task_call.args[0]) for task_call in mock_report_task.call_args_list],
+            [self.course_id, other_course_id],
+        )
+
+    @patch("periodic_instructor_reports.tasks.PeriodicReportSchedule")
+    @patch("periodic_instructor_reports.tasks.get_function_from_path")
+    def test_task_wrapper_spans(self, mock_get_function, mock_schedules):
+        """
+        Test the periodic run records spans of its steps within the span of the wrapper.
+        """
+
+        owner = Mock()
+        schedule_id = 1
+        InMemoryTracer.finished_spans = []
+
+        mock_get_function.return_value = Mock()
+        mock_schedules.objects.get.return_value = self.get_mock_schedule(schedule_id, owner)
+
+        periodic_task_wrapper(schedule_id)
+
+        *step_spans, wrapper_span = InMemoryTracer.finished_spans
+
+        self.assertEqual(wrapper_span.name, "periodic_task_wrapper")
+        self.assertEqual(
+            [step_span.name for step_span in step_spans],
+            ["schedule.load", "courses.expand", "report.call"],
+        )
+        self.assertTrue(all(step_span.parent == wrapper_span.context for step_span in step_spans))
+        self.assertEqual(step_spans[-1].attributes["course"], self.course_id)
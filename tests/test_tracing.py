@@ -0,0 +1,130 @@
+from unittest import TestCase
+from unittest.mock import Mock
+
+from django.test import override_settings
+
+from periodic_instructor_reports.tracing import (
+    InMemoryTracer,
+    SpanContext,
+    extract_trace_context,
+    get_current_context,
+    inject_trace_context,
+    reset_trace_context,
+    span,
+)
+
+
+class SpanTestCase(TestCase):
+    """
+    Test recording spans.
+    """
+
+    def setUp(self):
+        InMemoryTracer.finished_spans = []
+
+    def test_nested_spans(self):
+        """
+        Test spans started within a span are its children.
+        """
+
+        with span("parent", schedule=1) as parent_span:
+            with span("child") as child_span:
+                self.assertEqual(get_current_context(), child_span.context)
+
+        self.assertIsNone(get_current_context())
+        self.assertEqual(
+            [finished_span.name for finished_span in InMemoryTracer.finished_spans],
+            ["child", "parent"],
+        )
+        self.assertIsNone(parent_span.parent)
+        self.assertEqual(parent_span.attributes, {"schedule": 1})
+        self.assertEqual(child_span.parent, parent_span.context)
+        self.assertEqual(child_span.context.trace_id, parent_span.context.trace_id)
+
+    def test_exception(self):
+        """
+        Test the exception raised within a span is recorded.
+        """
+
+        with self.assertRaises(ValueError):
+            with span("failing"):
+                raise ValueError("test")
+
+        self.assertIsInstance(InMemoryTracer.finished_spans[0].exception, ValueError)
+
+    @override_settings(PERIODIC_INSTRUCTOR_REPORTS_TRACER="")
+    def test_disabled(self):
+        """
+        Test nothing is recorded if tracing is disabled.
+        """
+
+        with span("disabled") as disabled_span:
+            self.assertIsNone(disabled_span)
+
+        self.assertEqual(InMemoryTracer.finished_spans, [])
+
+
+class TraceContextPropagationTestCase(TestCase):
+    """
+    Test passing the trace context to Celery tasks.
+    """
+
+    def setUp(self):
+        InMemoryTracer.finished_spans = []
+
+    def test_traceparent(self):
+        """
+        Test converting span contexts from and to W3C traceparent header values.
+        """
+
+        context = SpanContext("a" * 32, "b" * 16)
+
+        self.assertEqual(SpanContext.from_traceparent(context.to_traceparent()), context)
+        self.assertIsNone(SpanContext.from_traceparent("invalid"))
+
+    def test_inject_within_span(self):
+        """
+        Test tasks published within a span receive its context.
+        """
+
+        headers = {}
+
+        with span("parent") as parent_span:
+            inject_trace_context(sender="lms.djangoapps.instructor_task.tasks.calculate_grades_csv",
+                                 headers=headers)
+
+        self.assertEqual(headers, {"traceparent": parent_span.context.to_traceparent()})
+
+    def test_inject_new_trace(self):
+        """
+        Test tasks of the app published outside of a span start a new trace, other tasks do not.
+        """
+
+        headers = {}
+        inject_trace_context(sender="periodic_instructor_reports.tasks.periodic_task_wrapper", headers=headers)
+
+        publish_span, = InMemoryTracer.finished_spans
+        self.assertEqual(headers, {"traceparent": publish_span.context.to_traceparent()})
+
+        headers = {}
+        inject_trace_context(sender="other.task", headers=headers)
+        self.assertEqual(headers, {})
+
+    def test_extract(self):
+        """
+        Test the received context is the parent of the task's spans until the task finished.
+        """
+
+        context = SpanContext("a" * 32, "b" * 16)
+        mock_task = Mock()
+        mock_task.request.traceparent = context.to_traceparent()
+
+        extract_trace_context(task_id="task", task=mock_task)
+
+        with span("child") as child_span:
+            pass
+
+        reset_trace_context(task_id="task")
+
+        self.assertEqual(child_span.parent, context)
+        self.assertIsNone(get_current_context())